@@ -9,6 +9,8 @@ from airflow.operators.python_operator import PythonOperator
 
 
 retailers = Variable.get("retailer_config", deserialize_json=True)
+# 'task': one extraction task per retailer, 'batch': all the retailers extracted by a single extract_all task
+extract_mode = Variable.get("retailer_extract_mode", default_var="task")
 
 HOME_DIR = os.path.expanduser('~')
 SRC_HOME = os.path.join(HOME_DIR, 'dev_Sehan/Olaplex-Retail-Dev/retail/main')
@@ -79,11 +81,22 @@ load_to_stg = BashOperator(
     trigger_rule='none_skipped'
     )
 
+if extract_mode == 'batch':
+    extract_all = BashOperator(
+        dag=dag,
+        task_id='extract_all',
+        bash_command=f"cd {SRC_HOME} && python3 main.py extract_all"
+    )
+    sync_git_repos >> extract_all
+
 for k,v in retailers.items():
     if v["enable"] == "yes":
-        retailer_task = createRetailerTask(retailer_name=k)
         check_status = createCheckStatusTask(retailer_name=k)
-        sync_git_repos >> retailer_task >> check_status >> load_to_stg
+        if extract_mode == 'batch':
+            extract_all >> check_status >> load_to_stg
+        else:
+            retailer_task = createRetailerTask(retailer_name=k)
+            sync_git_repos >> retailer_task >> check_status >> load_to_stg
 
 
 load_to_dwh = BashOperator(
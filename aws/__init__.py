@@ -1,2 +1,21 @@
-from .aws_s3 import S3
-from .aws_redshift import Redshift
\ No newline at end of file
+import importlib
+
+# imported on first use, S3 needs boto3 and Redshift psycopg2
+_modules = {
+    'S3': 'aws_s3',
+    'Redshift': 'aws_redshift',
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
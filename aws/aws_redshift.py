@@ -1,6 +1,8 @@
+import time
+import atexit
 import psycopg2
 import logging
-import pandas as pd
+import threading
 
 logging.basicConfig(
     level=logging.INFO,
@@ -8,9 +10,102 @@ logging.basicConfig(
 )
 
 
+class ConnectionPool:
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_config, max_idle=4, check_after=60):
+        """
+        Keeps the idle connections of a database so they are reused instead of opening a new TLS connection
+        every time. A connection idle for more than check_after seconds is checked with SELECT 1 before reuse.
+        Use get_pool() to get the process-wide pool of a database.
+        :param max_idle: connections kept open once released, extra ones are closed
+        """
+        self.db_config = db_config
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._idle = []  # list of tuples (connection, released_at)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(f"pool:{db_config['host']}:{db_config['port']}/{db_config['dbname']}")
+
+    @classmethod
+    def get_pool(cls, db_config):
+        key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(db_config)
+            return cls._pools[key]
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+    @staticmethod
+    def _is_healthy(connection):
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        :return: tuple (connection, reused)
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, released_at = self._idle.pop()
+            if connection.closed != 0:
+                continue
+            if time.monotonic() - released_at < self.check_after or self._is_healthy(connection):
+                return connection, True
+            self.logger.info("Dropping stale database connection.")
+            connection.close()
+        return psycopg2.connect(**self.db_config), False
+
+    def release(self, connection):
+        if connection is None or connection.closed != 0:
+            return
+        try:
+            # leave no transaction open (eg: after a named cursor) for the next user
+            connection.rollback()
+        except Exception:
+            connection.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            if connection.closed == 0:
+                connection.close()
+
+
+atexit.register(ConnectionPool.close_all)
+
+
 class Redshift:
 
-    def __init__(self, host, dbname, user, password, port=5439):
+    def __init__(self, host, dbname, user, password, port=5439, pooled=True):
+        """
+        Connections come from a process-wide pool (pooled=True), closing a connection returns it to the pool.
+        The object can be used as a context manager, the connection is released on exit:
+            with Redshift(**app_config.redshift_creds) as rdsft:
+                rdsft.run_sql_command(sql, close_on_return=False)
+        """
         self.db_config = {
             'host': host,
             'port': port,
@@ -19,6 +114,8 @@ class Redshift:
             'password': password
         }
         self.logger = self._get_logger()
+        self.pool = ConnectionPool.get_pool(self.db_config) if pooled else None
+        self.connection = None
         self._set_up_connection(initial=True)  # open up the connection initially
 
     def _get_logger(self):
@@ -28,9 +125,15 @@ class Redshift:
 
     def _set_up_connection(self, initial=False):
         try:
-            self.connection = psycopg2.connect(**self.db_config)
+            reused = False
+            if self.pool:
+                self.connection, reused = self.pool.acquire()
+            else:
+                self.connection = psycopg2.connect(**self.db_config)
             if self._get_connection_status() == 'open':
-                if initial:
+                if reused:
+                    self.logger.info("Database connection reused from the pool.")
+                elif initial:
                     self.logger.info("Database connection established.")
                 else:
                     self.logger.info("Database connection re-established.")
@@ -41,7 +144,31 @@ class Redshift:
 
     def _get_connection_status(self):
         # connection.closed flag is zero if the connection is open and non-zero otherwise
-        return 'open' if self.connection.closed == 0 else 'closed'
+        return 'open' if self.connection is not None and self.connection.closed == 0 else 'closed'
+
+    def _close_connection(self):
+        """
+        Returns the connection to the pool, or closes it when the object is not pooled
+        """
+        if self.pool:
+            self.pool.release(self.connection)
+            self.connection = None
+            self.logger.info("Database connection released to the pool.")
+        else:
+            self.connection.close()
+            self.logger.info("Database connection closed.")
+
+    def close(self):
+        if self._get_connection_status() == 'open':
+            self._close_connection()
+
+    def __enter__(self):
+        if self._get_connection_status() == 'closed':
+            self._set_up_connection()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def __str__(self):
         return 'Redshift:{}:{}/{}'.format(self.db_config['host'], self.db_config['port'], self.db_config['dbname'])
@@ -51,8 +178,7 @@ class Redshift:
         In case the connection is left open(not recommended), it it closed here.
         """
         if self._get_connection_status() == 'open':
-            self.connection.close()
-            self.logger.info("Database connection closed.")
+            self._close_connection()
 
     def run_sql_command(self, sql_command, close_on_return=True):
         """
@@ -61,7 +187,8 @@ class Redshift:
             - COPY and UPLOAD commands
             - DDL commands such as CREATE, DROP, ALTER, TRUNCATE etc.
             - DML commands such as GRANT and REVOKE
-        If close_on_return is set, connection is closed on return.
+        If close_on_return is set, connection is closed on return. A failed command is rolled back, so the
+        connection can run the next one.
         """
         success = False
         # In case the connection is closed, set it up again
@@ -74,11 +201,15 @@ class Redshift:
                 success = True
         except Exception as e:
             self.logger.error(e)
+            # a connection kept open with close_on_return=False must not stay in the aborted transaction
+            try:
+                self.connection.rollback()
+            except Exception as rollback_error:
+                self.logger.error(f"Rollback failed: {rollback_error}")
             raise
         finally:
             if self._get_connection_status() == 'open' and close_on_return:
-                self.connection.close()
-                self.logger.info("Database connection closed.")
+                self._close_connection()
             return success
 
     def fetch_data(self, sql_command, batch_size=1000, close_on_return=True):
@@ -111,8 +242,7 @@ class Redshift:
 
         finally:
             if self._get_connection_status() == 'open' and close_on_return:
-                self.connection.close()
-                self.logger.info("Database connection closed.")
+                self._close_connection()
             return
 
     def read_sql(self, sql, close_on_return=True, **kwargs):
@@ -124,6 +254,8 @@ class Redshift:
         (https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_sql.html)
         :return: pandas dataframe with the result of the sql query
         """
+        import pandas as pd
+
         # In case the connection is closed, set it up again
         df = None
         if self._get_connection_status() == 'closed':
@@ -136,6 +268,5 @@ class Redshift:
 
         finally:
             if self._get_connection_status() == 'open' and close_on_return:
-                self.connection.close()
-                self.logger.info("Database connection closed.")
+                self._close_connection()
             return df
@@ -1,11 +1,18 @@
 import gzip
+import time
+import zlib
 import pytz
 import boto3
+import shutil
 import logging
-import pandas as pd
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
-from io import TextIOWrapper
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,11 +20,83 @@ logging.basicConfig(
 )
 
 
+class MultipartWriter:
+    def __init__(self, s3_client, bucket_name, key, compression=None, part_size=8 * 1024 * 1024):
+        """
+        File like writer streaming bytes to an S3 object through a multipart upload, compressing on the fly.
+        Data is sent in parts of part_size bytes (S3 minimum is 5 MB), a payload smaller than one part is
+        sent with a single put_object call.
+        :param compression: None, 'gzip' or 'zstd' (requires the zstandard package)
+        """
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.compressor = self._get_compressor(compression)
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = None
+
+    @staticmethod
+    def _get_compressor(compression):
+        if not compression:
+            return None
+        elif compression == 'gzip':
+            return zlib.compressobj(level=6, wbits=31)  # wbits=31 writes the gzip header and trailer
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise Exception("zstd compression requires the zstandard package")
+            return zstandard.ZstdCompressor().compressobj()
+        else:
+            raise ValueError(f"Unsupported compression {compression}. Use gzip or zstd.")
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if self.compressor:
+            data = self.compressor.compress(data)
+        self.buffer.extend(data)
+        if len(self.buffer) >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket_name,
+                                                                    Key=self.key)['UploadId']
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                                              PartNumber=part_number, Body=bytes(self.buffer))
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self.buffer = bytearray()
+
+    def close(self):
+        if self.compressor:
+            self.buffer.extend(self.compressor.flush())
+
+        if self.upload_id is None:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=self.key, Body=bytes(self.buffer))
+            return
+
+        if self.buffer:
+            self._upload_part()
+        self.s3_client.complete_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                                                 MultipartUpload={'Parts': self.parts})
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+
+
 class S3:
     def __init__(self, **kwargs):
         """
         This accepts aws_access_key_id and aws_secret_access_key as keyword arguments.
         No need to provide credentials if the aws cli is configured with aws keys.
+        Listings are cached for cache_ttl seconds (keyword argument, 30 by default, 0 disables the cache) so repeated
+        checks reuse a single listing. Any write through this object clears the cached listings of the bucket, before
+        and after the write, and a listing which ran while the cache was cleared is not stored.
         """
         if all(field in kwargs for field in ('aws_access_key_id', 'aws_secret_access_key')):
             self.credentials = {
@@ -27,6 +106,17 @@ class S3:
         else:
             self.credentials = None
 
+        # multipart uploads above 8 MB, 10 parts in flight per file
+        self.transfer_config = TransferConfig(multipart_threshold=8 * 1024 * 1024,
+                                              multipart_chunksize=8 * 1024 * 1024,
+                                              max_concurrency=10,
+                                              use_threads=True)
+        self.cache_ttl = kwargs.get('cache_ttl', 30)
+        self._listing_cache = {}  # {(bucket_name, prefix): (listed_at, objects)}
+        # bulk_upload writes from several threads, the generation counts the invalidations
+        self._listing_lock = threading.Lock()
+        self._listing_generation = 0
+
         self.logger = self._get_logger()
         self.s3_client = self._get_client()
         self.s3_resource = self._get_resource()
@@ -52,14 +142,43 @@ class S3:
         # TODO implement fancy way to express the object name
         return 's3 object'
 
+    def _get_cached_listing(self, bucket_name, prefix):
+        """
+        Returns a fresh cached listing covering the prefix (listing of the same prefix or of a parent prefix)
+        """
+        if not self.cache_ttl or not isinstance(prefix, str):
+            return None
+        now = time.monotonic()
+        with self._listing_lock:
+            for (cached_bucket, cached_prefix), (listed_at, objects) in list(self._listing_cache.items()):
+                if now - listed_at > self.cache_ttl:
+                    self._listing_cache.pop((cached_bucket, cached_prefix), None)
+                elif cached_bucket == bucket_name and prefix.startswith(cached_prefix):
+                    return objects
+        return None
+
+    def _invalidate_listing_cache(self, bucket_name):
+        with self._listing_lock:
+            self._listing_generation += 1
+            for key in [key for key in self._listing_cache if key[0] == bucket_name]:
+                self._listing_cache.pop(key, None)
+
     def _get_matching_objects(self, bucket_name, prefix='', suffix=''):
         """
         Generate objects in an S3 bucket.
         :param prefix: Only fetch objects whose key starts with this prefix (optional).
         :param suffix: Only fetch objects whose keys end with this suffix (optional).
         """
+        cached = self._get_cached_listing(bucket_name, prefix)
+        if cached is not None:
+            for obj in cached:
+                if obj['Key'].startswith(prefix) and obj['Key'].endswith(suffix):
+                    yield obj
+            return
 
         kwargs = {'Bucket': bucket_name}
+        listing = []
+        generation = self._listing_generation
 
         # If the prefix is a single string (not a tuple of strings), we can
         # do the filtering directly in the S3 API.
@@ -70,11 +189,8 @@ class S3:
             # The S3 API response is a large blob of metadata.
             # 'Contents' contains information about the listed objects.
             resp = self.s3_client.list_objects_v2(**kwargs)
-
-            try:
-                contents = resp['Contents']
-            except KeyError:
-                return
+            contents = resp.get('Contents', [])
+            listing.extend(contents)
 
             for obj in contents:
                 key = obj['Key']
@@ -88,6 +204,22 @@ class S3:
             except KeyError:
                 break
 
+        # only complete listings are cached, a listing which ran during a write may miss it
+        if self.cache_ttl and isinstance(prefix, str):
+            with self._listing_lock:
+                if generation == self._listing_generation:
+                    self._listing_cache[(bucket_name, prefix)] = (time.monotonic(), listing)
+
+    def get_matching_objects(self, bucket_name, prefix='', suffix=''):
+        """
+        Lists the objects in an S3 bucket with their metadata
+        :param bucket_name: Name of bucket (str)
+        :param prefix: Only fetch keys that start with this prefix (optional).
+        :param suffix: Only fetch keys that end with this suffix (optional).
+        :return: list of dictionaries {'Key': ..., 'Size': ..., 'LastModified': ..., 'ETag': ...}
+        """
+        return list(self._get_matching_objects(bucket_name=bucket_name, prefix=prefix, suffix=suffix))
+
     def get_matching_keys(self, bucket_name, prefix='', suffix='', limit=0):
         """
         Generate the keys in an S3 bucket.
@@ -141,25 +273,34 @@ class S3:
 
     def is_file_present(self, bucket_name, folder='', file=''):
         """
-        Checks if a key(file) exist in a folder
+        Checks if a key(file) exist in a folder, with a single head_object call unless a cached listing covers it
         :param folder: folder inside the bucket
         :param file: file inside the folder
         """
-        for obj in self.get_matching_keys(bucket_name=bucket_name, prefix=folder):
-            if obj == folder+"/"+file:
-                return True
-        return False
+        key = folder + "/" + file
+        cached = self._get_cached_listing(bucket_name, key)
+        if cached is not None:
+            return any(obj['Key'] == key for obj in cached)
+        try:
+            self.s3_client.head_object(Bucket=bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
 
     def is_folder_present(self, bucket_name, prefix=None):
         """
-        Checks if a key(folder) exist in a folder
+        Checks if a key(folder) exist in a folder, listing at most one key unless a cached listing covers it
         :param bucket_name: bucket inside the bucket
         :param prefix: folder/subfolder inside the bucket
         """
-        for obj in self.get_matching_keys(bucket_name=bucket_name, prefix=prefix):
-            if obj.startswith(prefix+"/"):
-                return True
-        return False
+        folder = prefix + "/"
+        cached = self._get_cached_listing(bucket_name, folder)
+        if cached is not None:
+            return any(obj['Key'].startswith(folder) for obj in cached)
+        resp = self.s3_client.list_objects_v2(Bucket=bucket_name, Prefix=folder, MaxKeys=1)
+        return resp.get('KeyCount', len(resp.get('Contents', []))) > 0
 
     def delete_matching_keys(self, bucket_name, prefix, suffix):
         success = True
@@ -174,6 +315,7 @@ class S3:
             try:
                 key_list = [{'Key': k} for k in matching_keys]
                 keys_to_delete = {'Objects':  key_list}
+                self._invalidate_listing_cache(bucket_name)
                 self.s3_resource.meta.client.delete_objects(Bucket=bucket_name, Delete=keys_to_delete)
                 self.logger.info("Deleted the following {} keys:\n\t{}".format(len(matching_keys),
                                                                                "\n\t".join(matching_keys)))
@@ -182,23 +324,92 @@ class S3:
                 self.logger.error(e)
 
             finally:
+                self._invalidate_listing_cache(bucket_name)
                 return success
 
     def write_bytes_to_s3(self, byte_data, bucket_name, key):
         data = BytesIO(byte_data)
         data.seek(0)
+        self._invalidate_listing_cache(bucket_name)
         try:
             self.s3_client.upload_fileobj(data, bucket_name, key)
             logging.info("Data uploaded to {}/{}/{}".format(self.s3_client.meta.endpoint_url, bucket_name, key))
+            return True
         except Exception as e:
             self.logger.error(e)
+            return False
+        finally:
+            self._invalidate_listing_cache(bucket_name)
+
+    @staticmethod
+    def _to_text(series, length=None):
+        """
+        Converts a column to the strings the JSON writer would produce, cut to length bytes like TRUNCATECOLUMNS
+        """
+        import pandas as pd
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            text = series.dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-3] + 'Z'
+        else:
+            text = series.map(str, na_action='ignore')
+
+        if length:
+            # a character is at most 4 bytes in utf-8, shorter strings can't overflow
+            long_text = text.str.len() > length // 4
+            text[long_text] = text[long_text].map(lambda v: v.encode('utf-8')[:length].decode('utf-8', 'ignore'))
+        return text
+
+    def _to_arrow_table(self, df, schema):
+        """
+        Conforms the DataFrame to a table schema. Columns are written in the schema order, missing ones as nulls
+        and columns not in the schema are dropped, the way Redshift's json 'auto' treats them.
+        :param schema: list of columns with name, data_type, length and scale (see retail/main/sql/schema.py)
+        :return: pyarrow Table
+        """
+        import pandas as pd
+        import pyarrow as pa
+
+        arrays = []
+        fields = []
+        for column in schema:
+            if column.name in df.columns:
+                series = df[column.name]
+            else:
+                series = pd.Series([None] * len(df), index=df.index, dtype=object)
+
+            if column.data_type in ('decimal', 'numeric'):
+                scale = column.scale or 0
+                quantum = Decimal(1).scaleb(-scale)
+                values = [None if pd.isna(v) else Decimal(repr(v)).quantize(quantum, rounding=ROUND_HALF_UP)
+                          for v in pd.to_numeric(series).astype(float).tolist()]
+                arrow_type = pa.decimal128(column.length or 38, scale)
+                array = pa.array(values, type=arrow_type)
+            elif column.data_type == 'timestamp':
+                arrow_type = pa.timestamp('us')
+                array = pa.Array.from_pandas(pd.to_datetime(series), type=arrow_type)
+            elif column.data_type in ('int', 'integer', 'int4', 'smallint', 'bigint', 'int8'):
+                arrow_type = pa.int64() if column.data_type in ('bigint', 'int8') else pa.int32()
+                values = [None if pd.isna(v) else int(v) for v in pd.to_numeric(series).tolist()]
+                array = pa.array(values, type=arrow_type)
+            else:
+                arrow_type = pa.string()
+                array = pa.Array.from_pandas(self._to_text(series, column.length), type=arrow_type)
+
+            arrays.append(array)
+            fields.append(pa.field(column.name, arrow_type))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
 
     def upload_dataframe(self, df, bucket_name, filename, s3_prefix='', file_format='csv',
-                         compress=True, delimiter='|', lowercase_headers=True):
+                         compress=True, delimiter='|', lowercase_headers=True, chunk_size=50000, schema=None):
         """
         Uploads pandas DataFrame to S3 without writing to disk locally.
-        By default the gzip compression is applied and header fields are lower-cased.
-        The default encoding is utf-8. File format can be json or csv with specified delimiter.
+        The DataFrame is serialized chunk_size rows at a time straight into a multipart upload, so the full
+        output is never held in memory. By default the gzip compression is applied and header fields are lower-cased.
+        The default encoding is utf-8. File format can be json (lines), csv with specified delimiter or parquet.
+        Parquet files are typed with the table schema (required) and snappy compressed, compress is ignored.
+        :param compress: True or 'gzip' (.gz), 'zstd' (.zst), False for no compression
+        :param schema: list of columns of the destination table (see retail/main/sql/schema.py)
+        :return: the key of the uploaded object, None if the upload failed
         """
         full_s3_key = "{}/{}".format(s3_prefix.strip("/"), filename.strip("/"))
         full_s3_key = full_s3_key.strip("/")
@@ -212,8 +423,8 @@ class S3:
             return
 
         file_format = file_format.lower()
-        if file_format not in ['csv', 'json']:
-            self.logger.error("Invalid file_format(only csv & json supported).")
+        if file_format not in ['csv', 'json', 'parquet']:
+            self.logger.error("Invalid file_format(only csv, json & parquet supported).")
             self.logger.info("Using default format i.e. pipe delimited csv")
             file_format = 'csv'
             delimiter = '|'
@@ -221,31 +432,54 @@ class S3:
         if lowercase_headers:
             df.columns = [col.lower() for col in df.columns]
 
-        if compress:
+        if file_format == 'parquet':
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise Exception("Writing parquet files requires the pyarrow package")
+            if not schema:
+                raise ValueError("A table schema is required to write parquet files")
+
+            table = self._to_arrow_table(df, schema)
+            buffer = BytesIO()
+            pq.write_table(table, buffer, row_group_size=chunk_size * 10, compression='snappy')
+            if self.write_bytes_to_s3(byte_data=buffer.getvalue(), bucket_name=bucket_name, key=full_s3_key):
+                return full_s3_key
+            return
+
+        compression = 'gzip' if compress is True else compress or None
+        if compression == 'gzip':
             full_s3_key += '.gz'
-            gz_buffer = BytesIO()
-            if file_format == 'csv':
-                with gzip.GzipFile(mode='w', fileobj=gz_buffer) as gz_file:
-                    df.to_csv(TextIOWrapper(gz_file, 'utf8'),index=False, sep=delimiter, header=True)
-            elif file_format == 'json':
-                with gzip.GzipFile(mode='w', fileobj=gz_buffer) as gz_file:
-                    df.to_json(TextIOWrapper(gz_file, 'utf8'),orient='records', date_format='iso', lines=True)
-            else:
-                pass
-            self.write_bytes_to_s3(byte_data=gz_buffer.getvalue(), bucket_name=bucket_name, key=full_s3_key)
+        elif compression == 'zstd':
+            full_s3_key += '.zst'
 
-        else:
-            buffer = None
+        self._invalidate_listing_cache(bucket_name)
+        writer = MultipartWriter(self.s3_client, bucket_name, full_s3_key, compression=compression)
+        try:
             if file_format == 'csv':
-                buffer = df.to_csv(header=True, index=False,sep=delimiter).encode('utf-8')
-            elif file_format == 'json':
-                buffer = df.to_json(orient='records', date_format='iso', lines=True).encode('utf-8')
-            else:
-                pass
-            self.write_bytes_to_s3(byte_data=buffer, bucket_name=bucket_name, key=full_s3_key)
+                writer.write(df.iloc[:0].to_csv(index=False, sep=delimiter, header=True))
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size]
+                if file_format == 'csv':
+                    writer.write(chunk.to_csv(index=False, sep=delimiter, header=False))
+                else:
+                    text = chunk.to_json(orient='records', date_format='iso', lines=True)
+                    # older pandas versions don't end the last line, chunks must not run into each other
+                    if not text.endswith('\n'):
+                        text += '\n'
+                    writer.write(text)
+            writer.close()
+            logging.info("Data uploaded to {}/{}/{}".format(self.s3_client.meta.endpoint_url, bucket_name, full_s3_key))
+            return full_s3_key
+        except Exception as e:
+            writer.abort()
+            self.logger.error(e)
+        finally:
+            self._invalidate_listing_cache(bucket_name)
 
     def delete_object(self, bucket_name, key):
         # TODO CHECK THIS METHOD AGAIN
+        self._invalidate_listing_cache(bucket_name)
         try:
             response = self.s3_resource.Object(bucket_name, key).delete()
             return True
@@ -253,6 +487,8 @@ class S3:
         except Exception as e:
             self.logger.error(e)
             return False
+        finally:
+            self._invalidate_listing_cache(bucket_name)
 
     def copy_object(self, source_bucket, source_key, destination_bucket, destination_path, destination_filename=None):
         if not destination_filename:
@@ -263,6 +499,7 @@ class S3:
                                              destination_filename)
 
         source_metadata = {'Bucket': source_bucket, 'Key': source_key}
+        self._invalidate_listing_cache(destination_bucket)
         try:
             self.s3_resource.meta.client.copy(source_metadata, destination_bucket, destination_key)
             self.logger.info("Successfully copied {} to {}".format(source_key, destination_key))
@@ -270,6 +507,8 @@ class S3:
         except Exception as e:
             self.logger.error(e)
             return False
+        finally:
+            self._invalidate_listing_cache(destination_bucket)
 
     def move_object(self, source_bucket, source_key, destination_bucket, destination_path, destination_filename=None):
         copied = self.copy_object(source_bucket, source_key, destination_bucket, destination_path, destination_filename)
@@ -280,6 +519,68 @@ class S3:
         else:
             return False
 
+    def _copy_for_move(self, bucket_name, source_key, destination_key, size):
+        source = {'Bucket': bucket_name, 'Key': source_key}
+        if size > 5 * 1024 ** 3:
+            # copy_object is limited to 5 GB, the managed copy switches to a multipart copy
+            self.s3_client.copy(source, bucket_name, destination_key)
+        else:
+            self.s3_client.copy_object(CopySource=source, Bucket=bucket_name, Key=destination_key)
+        return source_key
+
+    def move_prefix(self, bucket_name, source_prefix, destination_prefix, objects=None, max_workers=32,
+                    progress_every=500):
+        """
+        Moves every object under source_prefix to destination_prefix, keeping the rest of the key.
+        Objects are listed once, copied server side on a thread pool, then deleted with delete_objects in
+        batches of 1000 keys. Only copied objects are deleted, so a failed or interrupted move can simply be run
+        again: the remaining objects are still under source_prefix and copying an object twice is harmless.
+        :param source_prefix: 'unprocessed/'
+        :param destination_prefix: 'processed/'
+        :param objects: objects to move (dictionaries with Key and Size), all the objects under source_prefix if None
+        :return: tuple (number of moved objects, number of failed objects)
+        """
+        if objects is None:
+            objects = self.get_matching_objects(bucket_name=bucket_name, prefix=source_prefix)
+        total = len(objects)
+        if total == 0:
+            self.logger.info(f"No objects found under {source_prefix}. Nothing to move.")
+            return 0, 0
+
+        self.logger.info(f"Moving {total} objects from {source_prefix} to {destination_prefix}")
+        self._invalidate_listing_cache(bucket_name)
+        copied = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._copy_for_move, bucket_name, obj['Key'],
+                                       destination_prefix + obj['Key'][len(source_prefix):],
+                                       obj.get('Size', 0)): obj['Key'] for obj in objects}
+            for future in as_completed(futures):
+                try:
+                    copied.append(future.result())
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"Failed copying {futures[future]}: {e}")
+                done = len(copied) + failed
+                if done % progress_every == 0 or done == total:
+                    self.logger.info(f"Copied {len(copied)}/{total} objects ({failed} failed)")
+
+        moved = 0
+        for start in range(0, len(copied), 1000):
+            batch = copied[start:start + 1000]
+            response = self.s3_client.delete_objects(Bucket=bucket_name,
+                                                     Delete={'Objects': [{'Key': k} for k in batch], 'Quiet': True})
+            errors = response.get('Errors', [])
+            for error in errors:
+                self.logger.error(f"Failed deleting {error['Key']}: {error.get('Message')}")
+            failed += len(errors)
+            moved += len(batch) - len(errors)
+            self.logger.info(f"Deleted {moved}/{len(copied)} copied objects from {source_prefix}")
+
+        self._invalidate_listing_cache(bucket_name)
+        self.logger.info(f"Moved {moved} objects from {source_prefix} to {destination_prefix}, {failed} failed")
+        return moved, failed
+
     def rename_object(self, source_bucket, source_key, new_filename):
         """
         Simulates renaming of an object by copying data to a new object and deleting old object.
@@ -293,14 +594,71 @@ class S3:
             deleted = self.delete_object(bucket_name=source_bucket, key=source_key)
             return deleted
 
-    def upload_file(self, filename, bucket_name, key):
-        # TODO: allow compression of file before uploading
+    def upload_file(self, filename, bucket_name, key, compress=False):
+        """
+        Uploads a local file, with multipart uploads for large files (see transfer_config)
+        :param compress: gzip the file on the way, '.gz' is appended to the key
+        :return: True if the upload succeeded
+        """
+        self._invalidate_listing_cache(bucket_name)
         try:
-            self.s3_resource.meta.client.upload_file(filename, bucket_name, key)
+            if compress:
+                with open(filename, 'rb') as f, tempfile.TemporaryFile() as compressed:
+                    with gzip.GzipFile(fileobj=compressed, mode='wb') as gz_file:
+                        shutil.copyfileobj(f, gz_file)
+                    compressed.seek(0)
+                    self.s3_client.upload_fileobj(compressed, bucket_name, f"{key}.gz", Config=self.transfer_config)
+            else:
+                self.s3_client.upload_file(filename, bucket_name, key, Config=self.transfer_config)
             return True
         except Exception as e:
             self.logger.error(e)
             return False
+        finally:
+            self._invalidate_listing_cache(bucket_name)
+
+    def _timed_upload(self, upload, bucket_name):
+        upload = upload.copy()
+        start = time.monotonic()
+        if 'df' in upload:
+            key = self.upload_dataframe(bucket_name=bucket_name, **upload)
+        else:
+            key = upload['key'] + '.gz' if upload.get('compress') else upload['key']
+            if not self.upload_file(upload['filename'], bucket_name, upload['key'], upload.get('compress', False)):
+                key = None
+
+        result = {'key': key, 'success': key is not None, 'etag': None, 'size': None,
+                  'seconds': round(time.monotonic() - start, 3)}
+        if key is not None:
+            head = self.s3_client.head_object(Bucket=bucket_name, Key=key)
+            result['etag'] = head['ETag'].strip('"')
+            result['size'] = head['ContentLength']
+        return result
+
+    def bulk_upload(self, uploads, bucket_name, max_workers=8):
+        """
+        Uploads local files and DataFrames concurrently.
+        :param uploads: list of dictionaries, either a file {'filename': '_data/ADI/report.xlsx', 'key': 'raw/...',
+                        'compress': False} or a DataFrame with the arguments of upload_dataframe {'df': df,
+                        'filename': 'unprocessed/...', 'file_format': 'json', ...}
+        :param bucket_name: 'olaplex-retail-data-test'
+        :param max_workers: 8
+        :return: list of results in the order of uploads
+                 {'key': 'raw/...', 'success': True, 'etag': '9b2cf535f27731c974343645a3985328', 'size': 1024,
+                  'seconds': 0.35}
+        """
+        results = [None] * len(uploads)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._timed_upload, upload, bucket_name): index
+                       for index, upload in enumerate(uploads)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    self.logger.error(e)
+                    results[index] = {'key': None, 'success': False, 'etag': None, 'size': None, 'seconds': None}
+        return results
 
     def downlaod_file(self):
         pass
@@ -316,6 +674,8 @@ class S3:
                        see official Pandas documentation.
         :return: Pandas DataFrame
         """
+        import pandas as pd
+
         try:
             obj = self.s3_client.get_object(Bucket=bucket_name, Key=key)
             return pd.read_csv(obj['Body'], **kwargs)
@@ -332,6 +692,8 @@ class S3:
                        see official Pandas documentation.
         :return: pandas DataFrame
         """
+        import pandas as pd
+
         try:
             obj = self.s3_client.get_object(Bucket=bucket_name, Key=key)
             return pd.read_json(obj['Body'], **kwargs)
@@ -348,6 +710,8 @@ class S3:
                        see official Pandas documentation.
         :return: pandas DataFrame
         """
+        import pandas as pd
+
         try:
             obj = self.s3_client.get_object(Bucket=bucket_name, Key=key)
             return pd.read_excel(obj['Body'], **kwargs)
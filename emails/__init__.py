@@ -1 +1,22 @@
-from .gmail_api import Gmail
\ No newline at end of file
+import importlib
+
+# imported on first use, the Gmail client pulls in googleapiclient which tasks using only the history store
+# don't need
+_modules = {
+    'Gmail': 'gmail_api',
+    'HistoryStore': 'history',
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,6 +4,8 @@ import socket
 import base64
 import pickle
 import logging
+import httplib2
+import threading
 import mimetypes
 from airflow.models import Variable
 from airflow import AirflowException
@@ -17,6 +19,7 @@ from email.utils import parsedate_tz, mktime_tz
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 
 socket.setdefaulttimeout(600)  # set timeout to 10 minutes
@@ -32,14 +35,18 @@ class Gmail:
     def __init__(self, download_path='_data',
                  credentials_file='credentials.json',
                  token_file='token.pickle',
-                 credentials_var='olaplex_reports_gmail_api'):
+                 credentials_var='olaplex_reports_gmail_api',
+                 batch_size=50):
         self.download_path = download_path
+        self.batch_size = batch_size  # calls per batch HTTP request, Gmail allows up to 100
         self.scopes = ['https://www.googleapis.com/auth/gmail.readonly',
                        'https://www.googleapis.com/auth/gmail.modify']
         self.token_file = token_file
         self.credentials_file = credentials_file
         self.credentials_var = credentials_var
         self.logger = self._get_logger()
+        self.credentials = None
+        self._local = threading.local()
         self.service = self._setup_connection()
 
     def _get_logger(self):
@@ -82,17 +89,94 @@ class Gmail:
             # Save the credentials for the next run
             with open(self.token_file, 'wb') as token:
                 pickle.dump(creds, token)
+        self.credentials = creds
         service = build('gmail', 'v1', credentials=creds,cache_discovery=False)
         return service
 
+    def _get_http(self):
+        """
+        httplib2 connections are not thread safe. The service is shared but every thread sends its
+        requests through its own authorized connection, so one Gmail object can be used by a thread pool.
+        """
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
     def _get_labels(self):
-        results = self.service.users().labels().list(userId='me').execute()
+        results = self.service.users().labels().list(userId='me').execute(http=self._get_http())
         labels = results.get('labels', [])
         label_names = []
         for label in labels:
             label_names.append(label['name'])
         return label_names
 
+    def _get_label_ids(self):
+        """
+        :return: dict {label name: label id}
+        """
+        results = self.service.users().labels().list(userId='me').execute(http=self._get_http())
+        return {label['name']: label['id'] for label in results.get('labels', [])}
+
+    def get_history_id(self):
+        """
+        Returns the current historyId of the mailbox, the starting point of the next incremental fetch
+        :return: '1234567'
+        """
+        return self.service.users().getProfile(userId='me').execute(http=self._get_http())['historyId']
+
+    def _list_messages(self, query):
+        """
+        Lists all the messages matching the query, following nextPageToken through every result page
+        :param query: 'in:Retail_Reports-ADI is:unread'
+        :return: list of dictionaries {'id': '1784721fdb3cad7d', 'threadId': '1784721fdb3cad7d'}
+        """
+        messages = []
+        request = self.service.users().messages().list(userId='me', q=query)
+        while request is not None:
+            results = request.execute(http=self._get_http())
+            messages.extend(results.get('messages', []))
+            request = self.service.users().messages().list_next(request, results)
+        return messages
+
+    def _list_history_messages(self, start_history_id, label_id):
+        """
+        Lists the messages added to the label since start_history_id using users.history.list
+        :param start_history_id: '1234567'
+        :param label_id: 'Label_4'
+        :return: list of dictionaries {'id': '1784721fdb3cad7d', 'threadId': '1784721fdb3cad7d'},
+                 None if the history id is too old and a full query is needed
+        """
+        added = {}
+        deleted = set()
+        request = self.service.users().history().list(userId='me',
+                                                      startHistoryId=start_history_id,
+                                                      labelId=label_id,
+                                                      historyTypes=['messageAdded', 'labelAdded',
+                                                                    'messageDeleted'])
+        try:
+            while request is not None:
+                results = request.execute(http=self._get_http())
+                for record in results.get('history', []):
+                    for item in record.get('messagesAdded', []):
+                        added.setdefault(item['message']['id'], item['message'])
+                    for item in record.get('labelsAdded', []):
+                        if label_id in item.get('labelIds', []):
+                            added.setdefault(item['message']['id'], item['message'])
+                    for item in record.get('messagesDeleted', []):
+                        deleted.add(item['message']['id'])
+                request = self.service.users().history().list_next(request, results)
+        except HttpError as e:
+            # history records are kept for about a week, older ids return 404
+            if e.resp.status == 404:
+                self.logger.info(f"History id {start_history_id} is no longer available. Running full query.")
+                return None
+            raise
+
+        return [{'id': message['id'], 'threadId': message.get('threadId')}
+                for message_id, message in added.items() if message_id not in deleted]
+
     def _get_metadata(self, message):
         headers = message['payload']['headers']
         result = {}
@@ -127,27 +211,117 @@ class Gmail:
         result = self.service.users().messages().modify(userId='me',
                                                         id=message['id'],
                                                         body={'removeLabelIds': ['UNREAD']}
-                                                        ).execute()
+                                                        ).execute(http=self._get_http())
+
+    def _mark_all_as_seen(self, messages):
+        """
+        Marks the messages as seen with batchModify, one call for up to 1000 messages
+        :param messages: list of messages returned by _yield_messages
+        """
+        message_ids = [message['id'] for message in messages]
+        for start in range(0, len(message_ids), 1000):
+            ids = message_ids[start:start + 1000]
+            self.logger.info(f"Marking {len(ids)} messages as seen")
+            self.service.users().messages().batchModify(userId='me',
+                                                        body={'ids': ids, 'removeLabelIds': ['UNREAD']}
+                                                        ).execute(http=self._get_http())
+
+    def _execute_batch(self, requests):
+        """
+        Executes the requests through the Gmail batch HTTP endpoint, batch_size calls per round-trip.
+        Calls failed inside a batch (eg: rate limited) are retried one by one.
+        :param requests: list of tuples (request_id, HttpRequest)
+        :return: dict {request_id: response}
+        """
+        responses = {}
+        failed = {}
 
-    def _yield_messages(self, search_label='AA-Test', search_criteria='is:unread'):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                failed[request_id] = exception
+            else:
+                responses[request_id] = response
+
+        for start in range(0, len(requests), self.batch_size):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for request_id, request in requests[start:start + self.batch_size]:
+                batch.add(request, request_id=request_id)
+            batch.execute(http=self._get_http())
 
-        if search_label not in self._get_labels():
+        pending = dict(requests)
+        for request_id, exception in failed.items():
+            self.logger.info(f"Retrying request {request_id} failed in batch: {exception}")
+            responses[request_id] = pending[request_id].execute(http=self._get_http(), num_retries=3)
+        return responses
+
+    def _get_attachments_data(self, attachments, bulk=True):
+        """
+        Returns the base64 data of the attachment parts. Inline data is used as it is, the rest is
+        fetched with one attachments().get call per part, grouped in batch requests when bulk is set
+        :param attachments: list of tuples (message, part)
+        :param bulk: True
+        :return: list of base64 data in the same order as attachments
+        """
+        requests = []
+        for index, (message, part) in enumerate(attachments):
+            if 'data' not in part['body']:
+                requests.append((str(index), self.service.users().messages().attachments().get(
+                    userId='me',
+                    messageId=message.get('id'),
+                    id=part['body']['attachmentId'])))
+
+        if bulk:
+            responses = self._execute_batch(requests)
+        else:
+            responses = {request_id: request.execute(http=self._get_http()) for request_id, request in requests}
+
+        return [part['body']['data'] if 'data' in part['body'] else responses[str(index)]['data']
+                for index, (message, part) in enumerate(attachments)]
+
+    def _yield_messages(self, search_label='AA-Test', search_criteria='is:unread', bulk=False,
+                        start_history_id=None):
+        """
+        Yields the full messages matching the search.
+        When start_history_id is given only the messages added to the label after it are read (incremental mode),
+        unread ones when the search criteria has is:unread. Other search criteria are ignored in incremental mode.
+        """
+        label_ids = self._get_label_ids()
+        if search_label not in label_ids:
             self.logger.error("Not a valid search label")
             return
 
-        query = f'in:{search_label} {search_criteria}'
-        results = self.service.users().messages().list(userId='me', q=query).execute()
-        num_results = results['resultSizeEstimate']
+        messages = None
+        unread_only = False
+        if start_history_id:
+            messages = self._list_history_messages(start_history_id, label_ids[search_label])
+            unread_only = 'is:unread' in search_criteria
 
-        self.logger.info(f"found {num_results} matching emails")
-        if num_results == 0:
+        if messages is None:
+            unread_only = False
+            query = f'in:{search_label} {search_criteria}'
+            messages = self._list_messages(query)
+
+        self.logger.info(f"found {len(messages)} matching emails")
+        if not messages:
+            return
+
+        if bulk:
+            for start in range(0, len(messages), self.batch_size):
+                requests = [(message['id'], self.service.users().messages().get(
+                    userId='me', id=message['id'], format='full'))
+                    for message in messages[start:start + self.batch_size]]
+                responses = self._execute_batch(requests)
+                for request_id, _ in requests:
+                    msg = responses[request_id]
+                    if not unread_only or 'UNREAD' in msg.get('labelIds', []):
+                        yield msg
             return
-        messages = results.get('messages', [])
 
         for message in messages:
             msg = self.service.users().messages().get(
-                userId='me', id=message['id'], format='full').execute()
-            yield msg
+                userId='me', id=message['id'], format='full').execute(http=self._get_http())
+            if not unread_only or 'UNREAD' in msg.get('labelIds', []):
+                yield msg
     def get_email_text(self, search_label='AA-Test', search_criteria='is:unread', mark_as_seen=False):
         result = []
         for message in self._yield_messages(search_label, search_criteria):
@@ -182,7 +356,7 @@ class Gmail:
                         att = self.service.users().messages().attachments().get(
                             userId='me',
                             messageId=message.get('id'),
-                            id=att_id).execute()
+                            id=att_id).execute(http=self._get_http())
                         data = att['data']
 
                     full_path = self._generate_full_path(message, file_name)
@@ -198,48 +372,70 @@ class Gmail:
                 self._mark_as_seen(message)
         return path_list
 
-    def get_attachment_with_metadata(self, search_label='AA-Test',
-                                     search_criteria='is:unread', extensions=['csv', 'xlsx'], mark_as_seen=False):
-        result = []
-        for message in self._yield_messages(search_label, search_criteria):
+    def get_attachment_with_metadata(self, search_label='AA-Test', search_criteria='is:unread',
+                                     extensions=['csv', 'xlsx'], mark_as_seen=False, bulk=True, history_store=None,
+                                     download_path=None):
+        """
+        Downloads the attachments of the matching messages and returns their metadata.
+        With bulk set, messages and attachments are fetched through batch HTTP requests and all
+        messages are marked as seen with a single batchModify call.
+        With a history_store only the messages added since the last run are read. The checkpoint is moved
+        forward once the attachments are downloaded and the messages are marked as seen.
+        :param history_store: HistoryStore
+        :param download_path: '_data/ADI', overrides the download path of the object
+        """
+        start_history_id = None
+        history_id = None
+        if history_store is not None:
+            start_history_id = history_store.get(search_label)
+            # read before listing so messages arriving during the run are picked up by the next one
+            history_id = self.get_history_id()
+
+        messages = list(self._yield_messages(search_label, search_criteria, bulk=bulk,
+                                             start_history_id=start_history_id))
+        attachments = []
+        for message in messages:
             for part in message['payload'].get('parts', ''):
                 if part['filename']:
-                    data = None
                     file_name = part['filename']
                     # if file extension don't match skip
 
                     if file_name.split(".")[-1] not in extensions:
                         self.logger.info(f"Skipping file {file_name}. Not in expected format.")
                         continue
+                    attachments.append((message, part))
 
-                    if 'data' in part['body']:
-                        data = part['body']['data']
-
-                    else:
-                        att_id = part['body']['attachmentId']
-                        att = self.service.users().messages().attachments().get(
-                            userId='me',
-                            messageId=message.get('id'),
-                            id=att_id).execute()
-                        data = att['data']
-
-                    metadata = self._get_metadata(message)
-                    data_path = os.path.join(os.getcwd(), self.download_path)
-                    if not os.path.exists(data_path):
-                        self.logger.info("Creating {} folder".format(data_path))
-                        os.makedirs(data_path, exist_ok=True)
+        result = []
+        # attachments are fetched one batch at a time to keep at most batch_size files in memory
+        for start in range(0, len(attachments), self.batch_size):
+            chunk = attachments[start:start + self.batch_size]
+            for (message, part), data in zip(chunk, self._get_attachments_data(chunk, bulk=bulk)):
+                file_name = part['filename']
+                metadata = self._get_metadata(message)
+                data_path = os.path.join(os.getcwd(), download_path or self.download_path)
+                if not os.path.exists(data_path):
+                    self.logger.info("Creating {} folder".format(data_path))
+                    os.makedirs(data_path, exist_ok=True)
+
+                full_path = os.path.join(data_path, f"{metadata['Timestamp']}_{file_name}")
+                metadata['local_path'] = full_path
+                if not os.path.isfile(full_path):
+                    with open(full_path, 'wb') as f:
+                        f.write(base64.urlsafe_b64decode(data.encode('UTF-8')))
+                        self.logger.info("Data written to file {}".format(full_path))
+                        result.append(metadata)
+                else:
+                    self.logger.info(f"File {full_path} already exists. Skipping download.")
+
+        if mark_as_seen and messages:
+            if bulk:
+                self._mark_all_as_seen(messages)
+            else:
+                for message in messages:
+                    self._mark_as_seen(message)
 
-                    full_path = os.path.join(data_path, f"{metadata['Timestamp']}_{file_name}")
-                    metadata['local_path'] = full_path
-                    if not os.path.isfile(full_path):
-                        with open(full_path, 'wb') as f:
-                            f.write(base64.urlsafe_b64decode(data.encode('UTF-8')))
-                            self.logger.info("Data written to file {}".format(full_path))
-                            result.append(metadata)
-                    else:
-                        self.logger.info(f"File {full_path} already exists. Skipping download.")
-            if mark_as_seen:
-                self._mark_as_seen(message)
+        if history_store is not None and mark_as_seen:
+            history_store.set(search_label, history_id)
         return result
 
     def _create_email_message(self, **kwargs):
@@ -303,7 +499,7 @@ class Gmail:
                                          attachment=attachment,
                                          cc_email=cc_email)
         try:
-            message = self.service.users().messages().send(userId='me', body=msg).execute()
+            message = self.service.users().messages().send(userId='me', body=msg).execute(http=self._get_http())
             self.logger.info(f"Sent email with Message ID: {message['id']}")
             return message
         except HttpError as e:
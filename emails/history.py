@@ -0,0 +1,55 @@
+import os
+import json
+import logging
+
+
+class HistoryStore:
+    def __init__(self, path='_history'):
+        """
+        Stores the last processed Gmail historyId of each email label, one small JSON document per label.
+        This class keeps the documents in a local folder, override _read() and _write() to keep them elsewhere.
+        :param path: '_data/_reports/history'
+        """
+        self.path = path
+        self.logger = logging.getLogger(self.__str__())
+
+    def __str__(self):
+        return 'gmail history store'
+
+    def _name(self, label):
+        return f"{label}.json"
+
+    def _read(self, name):
+        """
+        :param name: 'Retail_Reports-ADI.json'
+        :return: document content (str) or None if it doesn't exist
+        """
+        full_path = os.path.join(self.path, name)
+        if not os.path.isfile(full_path):
+            return None
+        with open(full_path, 'r') as f:
+            return f.read()
+
+    def _write(self, name, content):
+        os.makedirs(self.path, exist_ok=True)
+        full_path = os.path.join(self.path, name)
+        with open(full_path, 'w') as f:
+            f.write(content)
+
+    def get(self, label):
+        """
+        :param label: 'Retail_Reports-ADI'
+        :return: '1234567' or None if the label was never processed
+        """
+        content = self._read(self._name(label))
+        if not content:
+            return None
+        return json.loads(content).get('history_id')
+
+    def set(self, label, history_id):
+        """
+        :param label: 'Retail_Reports-ADI'
+        :param history_id: '1234567'
+        """
+        self.logger.info(f"Saving history id {history_id} for label {label}")
+        self._write(self._name(label), json.dumps({'label': label, 'history_id': str(history_id)}))
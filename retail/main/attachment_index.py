@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+import aws
+
+
+class AttachmentIndex:
+
+    def __init__(self, path):
+        """
+        Persistent index of the content hashes of the processed email attachments, kept in a SQLite file.
+        A file re-sent or forwarded with the same content is found in the index and not processed again.
+        :param path: '_data/_reports/attachments/ADI.db'
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._pull()
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS attachments ("
+                               "content_hash TEXT PRIMARY KEY, file_name TEXT, message_id TEXT, processed_at TEXT)")
+
+    def _connect(self):
+        # a connection per operation, the index is used from the fetch and the upload threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _pull(self):
+        pass
+
+    def _push(self):
+        pass
+
+    @staticmethod
+    def file_hash(path, chunk_size=1024 * 1024):
+        """
+        :param path: '_data\\ADI\\1616101111_ADI Inventory Report 2020-12-31.xlsx'
+        :return: sha256 of the file content
+        """
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def contains(self, content_hash):
+        with self._connect() as connection:
+            row = connection.execute("SELECT 1 FROM attachments WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row is not None
+
+    def add(self, entries):
+        """
+        :param entries: list of tuples (content_hash, file_name, message_id)
+        """
+        processed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO attachments VALUES (?, ?, ?, ?)",
+                                   [(content_hash, file_name, message_id, processed_at)
+                                    for content_hash, file_name, message_id in entries])
+        logging.info(f"Added {len(entries)} attachments to the index {self.path}")
+        self._push()
+
+
+class S3AttachmentIndex(AttachmentIndex):
+
+    def __init__(self, path, bucket_name, key):
+        """
+        Attachment index synced with S3 so every Airflow worker sees the same processed files.
+        The SQLite file is downloaded when the index is opened and uploaded after every change.
+        :param bucket_name: 'olaplex-retail-data-test'
+        :param key: '_attachment_index/ADI.db'
+        """
+        self.bucket_name = bucket_name
+        self.key = key
+        self.s3 = aws.S3()
+        super().__init__(path)
+
+    def _pull(self):
+        from botocore.exceptions import ClientError
+        try:
+            self.s3.s3_client.download_file(self.bucket_name, self.key, self.path)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+                raise
+            logging.info(f"No attachment index found at {self.key}. Starting a new one.")
+
+    def _push(self):
+        if not self.s3.upload_file(self.path, self.bucket_name, self.key):
+            logging.error(f"Failed uploading the attachment index to {self.key}")
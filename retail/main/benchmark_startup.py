@@ -0,0 +1,65 @@
+"""
+Cold start benchmark of main.py. Imports main in fresh interpreters and reports the import time and which heavy
+dependencies got loaded, the time every BashOperator task pays before doing any work.
+Usage: python benchmark_startup.py [runs] [--importtime]
+       --importtime also prints the slowest imports of one run (python -X importtime)
+"""
+import os
+import sys
+import statistics
+import subprocess
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'googleapiclient', 'airflow', 'boto3', 'psycopg2')
+
+_probe = f"""
+import sys
+import time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(elapsed, len(sys.modules), ','.join(loaded))
+"""
+
+
+def run_probe(cwd):
+    result = subprocess.run([sys.executable, '-c', _probe], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing main failed:\n{result.stderr}")
+    elapsed, modules, loaded = result.stdout.splitlines()[-1].split(' ', 2)
+    return float(elapsed), int(modules), [name for name in loaded.split(',') if name]
+
+
+def slowest_imports(cwd, top=15):
+    """
+    :return: list of tuples (cumulative microseconds, module) of the slowest imports of main
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=cwd, capture_output=True, text=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        timings.append((int(cumulative), module.strip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def benchmark(runs=5, importtime=False):
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    results = [run_probe(cwd) for _ in range(runs)]
+    timings = [elapsed for elapsed, _, _ in results]
+    _, modules, loaded = results[-1]
+    print(f"import main: median {statistics.median(timings):.3f}s, min {min(timings):.3f}s, "
+          f"max {max(timings):.3f}s over {runs} runs")
+    print(f"modules loaded: {modules}")
+    print(f"heavy dependencies loaded: {', '.join(loaded) or 'none'}")
+    if importtime:
+        print("slowest imports (cumulative):")
+        for cumulative, module in slowest_imports(cwd):
+            print(f"  {cumulative / 1e6:8.3f}s  {module}")
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    benchmark(runs=int(args[0]) if args else 5, importtime='--importtime' in sys.argv)
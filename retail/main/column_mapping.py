@@ -0,0 +1,124 @@
+class ColumnMapping:
+
+    def __init__(self, mapping, hardcoded=None, dtypes=None, table_columns=None):
+        """
+        Declarative mapping of the columns of a report to the output columns. Report columns are matched to the
+        mapping keys case insensitively, only the matched columns are read from the report.
+        :param mapping: {'Art.nr': 'product_retailer_sku', 'Antal': 'total_quantity'}
+        :param hardcoded: {'reporting_period': 'Monthly', 'currency': 'SEK'} constant output columns
+        :param dtypes: {'Art.nr': str} dtypes of the report columns, by column name like pandas dtype
+        :param table_columns: ['product_sku', 'country', ...] columns of the destination table. Report columns
+                              outside the mapping named like one of them are read too and kept as they are, the
+                              upload lower-cases the headers and loads them.
+        """
+        self.mapping = mapping
+        self.hardcoded = hardcoded or {}
+        self.dtypes = dtypes or {}
+        self.table_columns = {column.lower() for column in table_columns or ()}
+        self._keys = {}
+        for key in mapping:
+            self._keys.setdefault(key.lower(), []).append(key)
+
+    def resolve(self, columns):
+        """
+        Matches the report columns to the mapping keys. Keys are ordered by their first matching column and a key
+        matching several columns takes the last one.
+        :param columns: ['ART.NR', 'Lager', 'Antal'] report columns, in the sheet order
+        :return: list of tuples [(0, 'Art.nr'), (2, 'Antal')] position of the report column and mapping key
+        """
+        positions = {}
+        for position, column in enumerate(columns):
+            if not isinstance(column, str):
+                continue
+            for key in self._keys.get(column.lower(), []):
+                positions[key] = position
+        return [(position, key) for key, position in positions.items()]
+
+    def _select(self, columns, read, extra_columns):
+        """
+        :param columns: report columns, in the sheet order
+        :param read: function reading the report, called with the positional usecols and the dtypes
+        :param extra_columns: ['Sub Region Code'] report columns read as they are, added after the mapped ones and
+                              the ones named like table columns
+        :return: pandas DataFrame with the output columns, empty if no column matches
+        """
+        import pandas as pd
+        resolved = self.resolve(columns)
+        if not resolved:
+            return pd.DataFrame()
+
+        extras = []
+        for name in extra_columns:
+            if name not in columns:
+                raise KeyError(name)
+            extras.append((columns.index(name), name))
+
+        if self.table_columns:
+            # a report column named like a mapped output column would end up twice in the upload
+            used = {position for position, _ in resolved + extras}
+            names = {self.mapping[key].lower() for _, key in resolved} | {name.lower() for name in extra_columns}
+            extras = [(position, column) for position, column in enumerate(columns)
+                      if isinstance(column, str) and column.lower() in self.table_columns and
+                      position not in used and column.lower() not in names] + extras
+
+        usecols = sorted({position for position, _ in resolved + extras})
+        dtype = {columns[position]: self.dtypes[columns[position]] for position in usecols
+                 if columns[position] in self.dtypes}
+        df = read(usecols, dtype)
+
+        # the columns are read in the sheet order, the matched ones are picked in the order of the mapping keys
+        frame_positions = {position: i for i, position in enumerate(usecols)}
+        selected = resolved + extras
+        return df.iloc[:, [frame_positions[position] for position, _ in selected]].set_axis(
+            [self.mapping[key] for _, key in resolved] + [name for _, name in extras], axis=1)
+
+    def read_excel(self, workbook, sheet_name=0, extra_columns=(), **kwargs):
+        """
+        Reads the mapped columns of a sheet. The header is read first, the sheet is then parsed for the matched
+        columns only and they are renamed to the output columns.
+        :param workbook: Workbook of the report
+        :param sheet_name: 'Sales'
+        :param extra_columns: ['Sub Region Code'] report columns the parser needs besides the mapped ones
+        :param kwargs: keyword arguments supported by pandas read_excel (skiprows, skipfooter etc.)
+        :return: pandas DataFrame
+        """
+        columns = workbook.get_columns(sheet_name, header=kwargs.get('header', 0), skiprows=kwargs.get('skiprows'))
+
+        def read(usecols, dtype):
+            if dtype:
+                kwargs['dtype'] = dtype
+            return workbook.parse(sheet_name, usecols=usecols, **kwargs)
+
+        return self._select(columns, read, extra_columns)
+
+    def read_csv(self, path, extra_columns=(), **kwargs):
+        """
+        Reads the mapped columns of a CSV report, like read_excel
+        :param path: '_data\\Baldacci\\1616101111_tb-rapport 2021 02.csv'
+        :param extra_columns: ['Sub Region Code']
+        :param kwargs: keyword arguments supported by pandas read_csv (delimiter, skiprows, encoding etc.)
+        :return: pandas DataFrame
+        """
+        import pandas as pd
+        header_kwargs = {k: v for k, v in kwargs.items() if k not in ('skipfooter', 'nrows', 'usecols', 'dtype')}
+        if kwargs.get('skipfooter'):
+            # the python engine reads the file with skipfooter, the header is split the same way
+            header_kwargs['engine'] = 'python'
+        columns = list(pd.read_csv(path, nrows=0, **header_kwargs).columns)
+
+        def read(usecols, dtype):
+            if dtype:
+                kwargs['dtype'] = dtype
+            return pd.read_csv(path, usecols=usecols, **kwargs)
+
+        return self._select(columns, read, extra_columns)
+
+    def add_hardcoded(self, df):
+        """
+        Adds the hardcoded columns to the mapped DataFrame in a single assignment
+        :param df: pandas DataFrame
+        :return: pandas DataFrame
+        """
+        if not self.hardcoded:
+            return df
+        return df.assign(**self.hardcoded)
@@ -1,24 +1,41 @@
 import os
 import logging
 import configparser
-from airflow.models import Variable
 
 
 class AppConfig:
 
     def __init__(self, config_file=None, config_str=None, airflow_var='retail_pipeline_config'):
-        self.config = configparser.ConfigParser()
-        if config_file:
-            self.config.read(config_file)
-        elif config_str:
-            self.config.read_string(config_str)
+        """
+        Application properties. They are read on the first property access and not when the module is imported,
+        so tasks which don't need them don't connect to the Airflow metadata database
+        """
+        self.config_file = config_file
+        self.config_str = config_str
+        self.airflow_var = airflow_var
+        self._config = None
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = self._load()
+        return self._config
+
+    def _load(self):
+        config = configparser.ConfigParser()
+        if self.config_file:
+            config.read(self.config_file)
+        elif self.config_str:
+            config.read_string(self.config_str)
         else:
             # read application properties from Airflow
             try:
-                app_props = Variable.get(airflow_var)
-                self.config.read_string(app_props)
+                from airflow.models import Variable
+                app_props = Variable.get(self.airflow_var)
+                config.read_string(app_props)
             except:
-                logging.error(f"Failed to get the variable value from airflow : {airflow_var}")
+                logging.error(f"Failed to get the variable value from airflow : {self.airflow_var}")
+        return config
 
     @property
     def s3_bucket_name(self):
@@ -36,6 +53,35 @@ class AppConfig:
     def s3_raw_dir(self):
         return self.config['S3']['RAW_DIR']
 
+    @property
+    def s3_manifest_dir(self):
+        """
+        Folder of the COPY manifests, kept out of the unprocessed folder so they are not loaded or archived
+        """
+        return self.config.get('S3', 'MANIFEST_DIR', fallback='_manifests')
+
+    @property
+    def s3_compress_raw_files(self):
+        return self.config.get('S3', 'COMPRESS_RAW_FILES', fallback='False') == 'True'
+
+    @property
+    def s3_upload_workers(self):
+        return self.config.getint('S3', 'UPLOAD_WORKERS', fallback=8)
+
+    @property
+    def s3_compression(self):
+        """
+        Compression of the processed files: 'gzip', 'zstd' or '' (uncompressed)
+        """
+        return self.config.get('S3', 'COMPRESSION', fallback='').lower()
+
+    @property
+    def s3_file_format(self):
+        """
+        Format of the processed files loaded to the staging tables: 'json' or 'parquet'
+        """
+        return self.config.get('S3', 'FILE_FORMAT', fallback='json').lower()
+
     @property
     def redshift_iam_role(self):
         return self.config['REDSHIFT']['IAM_ROLE']
@@ -107,6 +153,76 @@ class AppConfig:
             'credentials_var': self.config['EMAIL']['SENDER_EMAIL_VAR']
         }
 
+    @property
+    def email_history_store(self):
+        """
+        Where the Gmail history checkpoints are kept for incremental fetching: 'local', 's3' or '' (disabled)
+        """
+        return self.config.get('EMAIL', 'HISTORY_STORE', fallback='').lower()
+
+    @property
+    def email_history_path(self):
+        if self.email_history_store == 's3':
+            return self.config.get('EMAIL', 'HISTORY_S3_PREFIX', fallback='_gmail_history')
+        return os.path.join(self.download_path, '_reports', 'history')
+
+    @property
+    def attachment_index(self):
+        """
+        Where the content hashes of the processed attachments are kept: 'local', 's3' or '' (no dedup)
+        """
+        return self.config.get('LOCAL', 'ATTACHMENT_INDEX', fallback='').lower()
+
+    @property
+    def attachment_index_path(self):
+        return os.path.join(self.download_path, '_reports', 'attachments')
+
+    @property
+    def attachment_index_s3_prefix(self):
+        return self.config.get('S3', 'ATTACHMENT_INDEX_PREFIX', fallback='_attachment_index')
+
+    @property
+    def parsed_cache_enabled(self):
+        return self.config.get('LOCAL', 'PARSED_CACHE', fallback='False') == 'True'
+
+    @property
+    def parsed_cache_path(self):
+        return os.path.join(self.download_path, '_reports', 'parsed')
+
+    @property
+    def parsed_cache_max_size(self):
+        """
+        Size limit of the parsed sheet cache in bytes, set in MB in the config
+        """
+        return self.config.getint('LOCAL', 'PARSED_CACHE_SIZE_MB', fallback=1024) * 1024 * 1024
+
+    @property
+    def excel_reader(self):
+        """
+        Reader of the xlsx attachments: 'streaming' or 'pandas'
+        """
+        return self.config.get('LOCAL', 'EXCEL_READER', fallback='streaming').lower()
+
+    @property
+    def retailer_info_source(self):
+        """
+        Where the retailer details are read from: 'file', 'variable' (Airflow variable) or 's3'
+        """
+        return self.config.get('RETAILER', 'INFO_SOURCE', fallback='file').lower()
+
+    @property
+    def retailer_info_file(self):
+        # the retailer_info.csv next to the code if not set
+        return self.config.get('RETAILER', 'INFO_FILE', fallback='')
+
+    @property
+    def retailer_info_variable(self):
+        return self.config.get('RETAILER', 'INFO_VARIABLE', fallback='retailer_info')
+
+    @property
+    def retailer_info_s3_key(self):
+        return self.config.get('RETAILER', 'INFO_S3_KEY', fallback='_config/retailer_info.csv')
+
     @property
     def sender_email_address(self):
         return self.config['EMAIL']['SENDER_EMAIL']
@@ -127,5 +243,31 @@ class AppConfig:
     def drop_recreate_final_table(self):
         return self.config['REDSHIFT']['DROP_CREATE_FINAL_TABLES'] == 'True'
 
+    def redshift_table_keys(self, table_type):
+        """
+        Distribution key, sort keys and column encodings of the sales or inventory tables
+        :param table_type: 'sales'
+        :return: {'dist_key': 'record_id', 'sort_keys': ['retailer_id', 'reporting_period_end'], 'encode': True}
+        """
+        if table_type == 'sales':
+            default_sort_keys = 'retailer_id,reporting_period_end'
+        else:
+            default_sort_keys = 'retailer_id,effective_date'
+        prefix = table_type.upper()
+        dist_key = self.config.get('REDSHIFT', f'{prefix}_DISTKEY', fallback='record_id').strip().lower()
+        sort_keys = self.config.get('REDSHIFT', f'{prefix}_SORTKEY', fallback=default_sort_keys)
+        return {
+            'dist_key': dist_key or None,
+            'sort_keys': [key.strip().lower() for key in sort_keys.split(',') if key.strip()],
+            'encode': self.config.get('REDSHIFT', 'COLUMN_ENCODING', fallback='True') == 'True'
+        }
+
+    @property
+    def final_load_strategy(self):
+        """
+        How staging data is deduplicated into the final tables: 'anti_join' or 'legacy' (FIRST_VALUE / NOT IN)
+        """
+        return self.config.get('REDSHIFT', 'FINAL_LOAD_STRATEGY', fallback='anti_join').lower()
+
 
 app_config = AppConfig()
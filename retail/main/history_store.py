@@ -0,0 +1,29 @@
+import aws
+from emails import HistoryStore
+
+
+class S3HistoryStore(HistoryStore):
+    def __init__(self, bucket_name, prefix):
+        """
+        Gmail history checkpoints kept in S3, so every Airflow worker starts from the same point
+        :param bucket_name: 'olaplex-retail-data-test'
+        :param prefix: '_gmail_history'
+        """
+        super().__init__(path=prefix)
+        self.bucket_name = bucket_name
+        self.s3 = aws.S3()
+
+    def _key(self, name):
+        return f"{self.path.strip('/')}/{name}"
+
+    def _read(self, name):
+        try:
+            obj = self.s3.s3_client.get_object(Bucket=self.bucket_name, Key=self._key(name))
+        except self.s3.s3_client.exceptions.NoSuchKey:
+            return None
+        return obj['Body'].read().decode('utf-8')
+
+    def _write(self, name, content):
+        self.s3.write_bytes_to_s3(byte_data=content.encode('utf-8'),
+                                  bucket_name=self.bucket_name,
+                                  key=self._key(name))
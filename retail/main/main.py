@@ -1,28 +1,157 @@
+import os
 import logging
 import sys
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from config import app_config
 from retailer import Retailer
-from airflow import AirflowException
-from retailers import *
+import emails
+import aws
+from retailers.registry import create_retailer, create_retailers
 
 
 def extract_retailer_data(retailer_name):
     try:
-        retailer_obj = eval(retailer_name)()
+        retailer_obj = create_retailer(retailer_name)
         retailer_obj.parse_reports()
         retailer_obj.upload_to_s3()
+        retailer_obj.commit_attachments()
     except Exception as e:
+        from airflow import AirflowException
         raise AirflowException(e)
 
 
+def get_enabled_retailers():
+    """
+    :return: class names of the retailers enabled in the retailer_config Airflow variable
+    """
+    from airflow.models import Variable
+    retailer_config = Variable.get("retailer_config", deserialize_json=True)
+    return [name for name, config in retailer_config.items() if config["enable"] == "yes"]
+
+
+def _map_reports(retailer_obj, reports):
+    # runs in a worker process, the status list (with the output DataFrames) and the failed reports are sent back
+    # to the main process
+    return retailer_obj.map_reports(reports), retailer_obj.failed_reports
+
+
+def _upload(retailer_obj, s3):
+    retailer_obj.upload_to_s3(s3)
+    retailer_obj.commit_attachments()
+
+
+def _write_error_log(retailer_name, exc):
+    """
+    Writes the error of a failed retailer where check_retailer_status in the DAG looks for it
+    """
+    error_path = os.path.join(app_config.download_path, retailer_name)
+    os.makedirs(error_path, exist_ok=True)
+    error_file = os.path.join(error_path, 'error.log')
+    with open(error_file, 'a') as f:
+        f.write(f"Error: {exc}\n"
+                f"Traceback: {''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))}")
+    logging.error(f"Extraction failed for the retailer {retailer_name}: {exc}")
+
+
+def extract_all(retailer_names=None, fetch_workers=8, parse_workers=None):
+    """
+    Extracts the data of several retailers in one process. Reports are downloaded and uploaded on a thread pool
+    sharing one Gmail and one S3 client, and mapped on a process pool as soon as the reports of a retailer are in.
+    A failed retailer doesn't stop the others, its error is written to its error.log.
+    :param retailer_names: ['ADI', 'BSG'], all the enabled retailers in retailer_config by default
+    :param fetch_workers: 8
+    :param parse_workers: number of processes mapping the reports, number of CPUs by default
+    :return: dictionary {'ADI': {'status': 'success', 'reports': 2, 'outputs': 3}, ...}
+    """
+    if retailer_names is None:
+        retailer_names = get_enabled_retailers()
+
+    results = {name: {'status': 'failed', 'reports': 0, 'outputs': 0} for name in retailer_names}
+
+    def fetch(retailer_obj):
+        return retailer_obj, retailer_obj.fetch_reports(gmail=gmail)
+
+    def fail(retailer_name, exc):
+        results[retailer_name]['error'] = str(exc)
+        _write_error_log(retailer_name, exc)
+
+    # created up front in this thread, the retailer modules are imported once and not by concurrent fetch threads
+    retailer_objs, failed = create_retailers(retailer_names)
+    for retailer_name, exc in failed.items():
+        fail(retailer_name, exc)
+
+    email_config = app_config.reports_email_config.copy()
+    email_config['download_path'] = app_config.download_path
+    gmail = emails.Gmail(**email_config)
+    s3 = aws.S3()
+
+    # spawn, forking while the fetch threads hold locks (eg: logging) can deadlock the workers
+    mp_context = multiprocessing.get_context('spawn')
+    with ThreadPoolExecutor(max_workers=fetch_workers) as threads, \
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=mp_context) as processes:
+
+        fetches = {threads.submit(fetch, retailer_obj): name for name, retailer_obj in retailer_objs.items()}
+        mappings = {}
+        for future in as_completed(fetches):
+            retailer_name = fetches[future]
+            try:
+                retailer_obj, reports = future.result()
+            except Exception as e:
+                fail(retailer_name, e)
+                continue
+            logging.info(f"Downloaded {len(reports)} reports for the retailer {retailer_name}")
+            results[retailer_name]['reports'] = len(reports)
+            mappings[processes.submit(_map_reports, retailer_obj, reports)] = (retailer_name, retailer_obj)
+
+        uploads = {}
+        for future in as_completed(mappings):
+            retailer_name, retailer_obj = mappings[future]
+            try:
+                retailer_obj.status, retailer_obj.failed_reports = future.result()
+            except Exception as e:
+                fail(retailer_name, e)
+                continue
+            results[retailer_name]['outputs'] = len(retailer_obj.status)
+            uploads[threads.submit(_upload, retailer_obj, s3)] = (retailer_name, retailer_obj)
+
+        for future in as_completed(uploads):
+            retailer_name, retailer_obj = uploads[future]
+            try:
+                future.result()
+            except Exception as e:
+                fail(retailer_name, e)
+                continue
+            # errors of single files are handled by handle_parse_error and written to the error log
+            results[retailer_name]['status'] = 'errors' if os.path.isfile(retailer_obj.error_file) else 'success'
+
+    for retailer_name, result in results.items():
+        logging.info(f"{retailer_name}: {result}")
+    return results
+
+
 if __name__ == "__main__":
 
     if len(sys.argv) > 2 and sys.argv[1] == 'extract_retailer_data':
         retailer = sys.argv[2]
         extract_retailer_data(retailer)
 
+    elif len(sys.argv) > 1 and sys.argv[1] == 'extract_all':
+        extract_all(sys.argv[2:] or None)
+
+    elif len(sys.argv) > 1 and sys.argv[1] == 'migrate_tables':
+        table_types = sys.argv[2:] or ['staging', 'final']
+        for table_type in table_types:
+            if table_type not in ['staging', 'final']:
+                logging.error(f"Invalid table type {table_type} encountered, valid table types are - 'staging','final'")
+                sys.exit(-1)
+            Retailer.migrate_tables(table_type)
+
     elif len(sys.argv) > 1 and sys.argv[1] == 'load_to_staging_tables':
-        Retailer.load_to_staging_tables()
-        Retailer.archive_s3_data()
+        loaded_objects = Retailer.load_to_staging_tables()
+        # only the loaded files are archived, files uploaded during the load wait for the next run
+        Retailer.archive_s3_data(loaded_objects)
 
     elif len(sys.argv) >= 2 and sys.argv[1] == 'load_to_final_table':
         if len(sys.argv) > 2:
@@ -39,7 +168,9 @@ if __name__ == "__main__":
     else:
         logging.error("""Invalid argument. Valid arguments are : 
         1. extract_retailer_data <retailer_class_name>
-        2. load_to_staging_tables
-        3. load_to_final_table <table_type>
+        2. extract_all [<retailer_class_name> ...]
+        3. load_to_staging_tables
+        4. load_to_final_table <table_type>
+        5. migrate_tables [staging|final]
         """)
         sys.exit(-1)
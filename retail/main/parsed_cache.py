@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import shutil
+import logging
+
+
+class ParsedSheetCache:
+
+    def __init__(self, path, max_size=1024 * 1024 * 1024):
+        """
+        On-disk cache of the DataFrames the parsers hand to append_metadata, stored as Parquet.
+        The outputs of a report are kept in one folder named after the retailer, the content hash of the
+        attachment and the parser version, with a manifest listing the sheet and report type of every output.
+        The least recently used reports are evicted once the cache grows over max_size.
+        :param path: '_data/_reports/parsed'
+        :param max_size: 1073741824 (bytes)
+        """
+        self.path = path
+        self.max_size = max_size
+
+    def _entry_path(self, retailer, content_hash, parser_version):
+        return os.path.join(self.path, retailer, f"{content_hash}_{parser_version}")
+
+    def get(self, retailer, content_hash, parser_version):
+        """
+        :param retailer: 'ADI'
+        :param content_hash: sha256 of the attachment
+        :param parser_version: '1'
+        :return: list of tuples (sheet_name, report_type, DataFrame) or None when the report is not cached.
+                 An entry without outputs is dropped and None returned, the report is parsed again.
+        """
+        import pandas as pd
+        entry_path = self._entry_path(retailer, content_hash, parser_version)
+        manifest_file = os.path.join(entry_path, 'manifest.json')
+        if not os.path.isfile(manifest_file):
+            return None
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+            outputs = [(output['sheet_name'], output['report_type'],
+                        pd.read_parquet(os.path.join(entry_path, output['file'])))
+                       for output in manifest['outputs']]
+            if not outputs:
+                raise ValueError("the entry has no outputs")
+        except Exception as e:
+            logging.warning(f"Failed reading the parsed sheet cache {entry_path}: {e}")
+            shutil.rmtree(entry_path, ignore_errors=True)
+            return None
+        # the manifest mtime is the last use of the entry
+        os.utime(manifest_file)
+        return outputs
+
+    def put(self, retailer, content_hash, parser_version, outputs):
+        """
+        :param outputs: list of tuples (sheet_name, report_type, DataFrame)
+        :return: True if the report was cached, a report without outputs is not cached
+        """
+        entry_path = self._entry_path(retailer, content_hash, parser_version)
+        if not outputs:
+            logging.info(f"Not caching {entry_path}, no parsed sheets were collected")
+            return False
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            manifest = {'outputs': []}
+            for number, (sheet_name, report_type, df) in enumerate(outputs):
+                file = f"{number}.parquet"
+                df.to_parquet(os.path.join(tmp_path, file), index=False)
+                manifest['outputs'].append({'sheet_name': sheet_name, 'report_type': report_type, 'file': file})
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f)
+            shutil.rmtree(entry_path, ignore_errors=True)
+            os.rename(tmp_path, entry_path)
+        except Exception as e:
+            # mixed type object columns can't be written to Parquet, the report is parsed again next time
+            logging.warning(f"Failed caching the parsed sheets in {entry_path}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+        self._evict()
+        return True
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache is under max_size
+        """
+        entries = []
+        total_size = 0
+        for retailer in os.listdir(self.path):
+            retailer_path = os.path.join(self.path, retailer)
+            if not os.path.isdir(retailer_path):
+                continue
+            for entry in os.listdir(retailer_path):
+                entry_path = os.path.join(retailer_path, entry)
+                manifest_file = os.path.join(entry_path, 'manifest.json')
+                try:
+                    last_used = os.path.getmtime(manifest_file)
+                    size = sum(os.path.getsize(os.path.join(entry_path, file)) for file in os.listdir(entry_path))
+                except OSError:
+                    # entry being written or removed by another process
+                    continue
+                entries.append((last_used, size, entry_path))
+                total_size += size
+
+        for last_used, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logging.info(f"Evicting {entry_path} from the parsed sheet cache, "
+                         f"last used {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))}")
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
@@ -2,25 +2,33 @@ import os
 import glob
 import sys
 import logging
+import json
 import traceback
-import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from config import app_config
 from abc import ABC, abstractmethod
-from airflow import AirflowException
-from sql import sales_table_ddl
-from sql import inventory_table_ddl
+from sql import build_table_ddl
 from sql import load_retail_sales_sql
 from sql import load_retail_inventory_sql
-from awscli.clidriver import create_clidriver
-from utils import get_retailer_info, generate_report_id, generate_record_id, generate_uuid
+from sql import load_final_table_sql
+from sql import sales_table_schema
+from sql import inventory_table_schema
+from workbook import Workbook, CsvFile
+from utils import generate_row_ids
+from retailer_registry import get_retailer_registry
 
 sys.path.append(app_config.project_home)
-from emails import Gmail
-from aws import Redshift, S3
+import emails
+import aws
+from history_store import S3HistoryStore
+from attachment_index import AttachmentIndex, S3AttachmentIndex
+from parsed_cache import ParsedSheetCache
 
 
 class Retailer(ABC):
+    # part of the parsed sheet cache key, bump it in the sub class when its parser output changes
+    parser_version = '1'
 
     def __init__(self):
         """
@@ -28,18 +36,24 @@ class Retailer(ABC):
         retailer information loaded from a CSV file
         """
         self.name = self.__class__.__name__  # name of the class
-        retailer_info = get_retailer_info(self.name)
+        retailer_info = get_retailer_registry().get(self.name)
         if retailer_info:
             self.retailer_internal_id = retailer_info['retailer_internal_id']
             self.retailer_id = retailer_info["retailer_id"]
             self.email_label = retailer_info["email_label"]
             self.file_extensions = retailer_info["file_extensions"]
         else:
+            from airflow import AirflowException
             raise AirflowException(f'Retailer not found {self.name}')
 
         self.download_path = os.path.join(app_config.download_path, self.name)
         self._clear_cache()
         self.status = []
+        self.workbooks = {}
+        self.csv_files = {}
+        self.new_attachments = []  # list of tuples (content_hash, report_dict) of the reports to process
+        self.failed_reports = set()  # local_path of the reports which failed in handle_parse_error
+        self._parsed_outputs = None  # outputs of the report being mapped, collected for the parsed sheet cache
 
     def _clear_cache(self):
         """
@@ -54,13 +68,14 @@ class Retailer(ABC):
                 os.remove(f)
                 logging.info(f"Removed file {f}")
 
-    def _extract_email_reports(self, email_label, file_extnsions, mark_seen):
+    def _extract_email_reports(self, email_label, file_extnsions, mark_seen, gmail=None):
         """
         Access to email account and read unread mails and download attachments to download_path
         Uses credentials.json to log to email. Download attachments in each mail to _data/ADI/
         :param email_label: 'Retail_Reports-ADI'
         :param file_extnsions:
         :param mark_seen: True
+        :param gmail: Gmail object shared by several retailers, a new one is created when not given
         :return:
             list of dictionaries:
                 Following is a snapshot of dictionary in reports list
@@ -76,46 +91,178 @@ class Retailer(ABC):
                 'local_path': 'C:\\Users\\Dell\\Beacon Data\\OLAPLEX\\Olaplex-Retail-Dev\\_data\\ADI\\1616101111_ADI Inventory Report 2020-12-31.xlsx'
             }
         """
-        email_config = app_config.reports_email_config.copy()
-        email_config['download_path'] = self.download_path
-        gmail = Gmail(**email_config)
+        if gmail is None:
+            email_config = app_config.reports_email_config.copy()
+            email_config['download_path'] = self.download_path
+            gmail = emails.Gmail(**email_config)
         return gmail.get_attachment_with_metadata(search_label=email_label,
                                                   extensions=self.file_extensions,
-                                                  mark_as_seen=mark_seen)
+                                                  mark_as_seen=mark_seen,
+                                                  history_store=self._get_history_store(),
+                                                  download_path=self.download_path)
 
-    # This method can be transfered to retailer.py
-    def parse_reports(self, mark_as_seen=True):
+    @staticmethod
+    def _get_history_store():
         """
-        Use extract_email_reports to reports[] variable
-        to each item in reports use map_file in sub class
+        Returns the store of the Gmail history checkpoints set in the config, None when incremental fetching is off
+        :return: HistoryStore
+        """
+        if app_config.email_history_store == 's3':
+            return S3HistoryStore(bucket_name=app_config.s3_bucket_name, prefix=app_config.email_history_path)
+        elif app_config.email_history_store == 'local':
+            return emails.HistoryStore(path=app_config.email_history_path)
+        return None
+
+    def fetch_reports(self, mark_as_seen=True, gmail=None):
+        """
+        Downloads the email reports of the retailer
         :param mark_as_seen: True
+        :param gmail: Gmail object shared by several retailers (optional)
+        :return: list of report dictionaries (see _extract_email_reports)
         """
         reports = self._extract_email_reports(email_label=self.email_label,
                                               file_extnsions=self.file_extensions,
-                                              mark_seen=mark_as_seen)
+                                              mark_seen=mark_as_seen,
+                                              gmail=gmail)
+        return self._skip_known_attachments(reports)
+
+    def _get_attachment_index(self):
+        """
+        Returns the attachment index of the retailer set in the config, None when attachment dedup is off
+        :return: AttachmentIndex
+        """
+        path = os.path.join(app_config.attachment_index_path, f"{self.name}.db")
+        if app_config.attachment_index == 's3':
+            return S3AttachmentIndex(path=path,
+                                     bucket_name=app_config.s3_bucket_name,
+                                     key=f"{app_config.attachment_index_s3_prefix}/{self.name}.db")
+        elif app_config.attachment_index == 'local':
+            return AttachmentIndex(path=path)
+        return None
+
+    def _skip_known_attachments(self, reports):
+        """
+        Drops the reports whose file content was already processed, in a previous run or earlier in this one
+        :param reports: list of report dictionaries
+        :return: list of report dictionaries to process
+        """
+        index = self._get_attachment_index()
+        if index is None:
+            return reports
+
+        new_reports = []
+        new_hashes = set()
+        for report_dict in reports:
+            content_hash = AttachmentIndex.file_hash(report_dict['local_path'])
+            if content_hash in new_hashes or index.contains(content_hash):
+                logging.info(f"Skipping file {os.path.basename(report_dict['local_path'])}. "
+                             f"The same file was already processed.")
+                continue
+            new_hashes.add(content_hash)
+            self.new_attachments.append((content_hash, report_dict))
+            new_reports.append(report_dict)
+        return new_reports
+
+    def commit_attachments(self):
+        """
+        Adds the processed attachments to the attachment index. To be called once the outputs are uploaded,
+        reports which failed are left out so they are processed again when re-sent.
+        """
+        index = self._get_attachment_index()
+        if index is None:
+            return
+        entries = [(content_hash, os.path.basename(report_dict['local_path']), report_dict['ID'])
+                   for content_hash, report_dict in self.new_attachments
+                   if report_dict['local_path'] not in self.failed_reports]
+        if entries:
+            index.add(entries)
+
+    def map_reports(self, reports):
+        """
+        Use map_file in sub class on each downloaded report
+        :param reports: list of report dictionaries returned by fetch_reports
+        :return: status list with the output of every mapped sheet
+        """
+        cache = self._get_parsed_cache()
         for report_dict in reports:
+            if cache is None:
+                self._map_file(report_dict)
+            else:
+                self._map_file_cached(cache, report_dict)
+        return self.status
+
+    @staticmethod
+    def _get_parsed_cache():
+        if not app_config.parsed_cache_enabled:
+            return None
+        return ParsedSheetCache(path=app_config.parsed_cache_path, max_size=app_config.parsed_cache_max_size)
+
+    def _map_file_cached(self, cache, report_dict):
+        """
+        Maps a report from the parsed sheet cache when the same file was parsed before by the same parser version,
+        the email metadata is stamped again by append_metadata. Otherwise the report is mapped with _map_file and
+        cached if none of its sheets failed and every output went through _record_output.
+        :param cache: ParsedSheetCache
+        :param report_dict: report dictionary returned by fetch_reports
+        """
+        file_name = os.path.basename(report_dict['local_path'])
+        content_hash = AttachmentIndex.file_hash(report_dict['local_path'])
+        outputs = cache.get(self.name, content_hash, self.parser_version)
+        if outputs:
+            logging.info(f"Loaded {len(outputs)} parsed sheets of {file_name} from the cache")
+            for sheet_name, report_type, df in outputs:
+                self.append_metadata(df, report_dict.copy(), report_type, sheet_name)
+            return
+
+        self._parsed_outputs = []
+        mapped_before = len(self.status)
+        try:
             self._map_file(report_dict)
+            mapped = len(self.status) - mapped_before
+            if report_dict['local_path'] not in self.failed_reports:
+                if mapped == len(self._parsed_outputs):
+                    cache.put(self.name, content_hash, self.parser_version, self._parsed_outputs)
+                else:
+                    # an append_metadata which doesn't call _record_output, the cache would drop its outputs
+                    logging.warning(f"Not caching {file_name}, {mapped} outputs mapped but "
+                                    f"{len(self._parsed_outputs)} recorded")
+        finally:
+            self._parsed_outputs = None
+
+    # This method can be transfered to retailer.py
+    def parse_reports(self, mark_as_seen=True):
+        """
+        Use extract_email_reports to reports[] variable
+        to each item in reports use map_file in sub class
+        :param mark_as_seen: True
+        """
+        self.map_reports(self.fetch_reports(mark_as_seen=mark_as_seen))
+
+    @property
+    def error_file(self):
+        return os.path.join(self.download_path, 'error.log')
 
-    def upload_to_s3(self):
+    def upload_to_s3(self, s3=None):
         """
-        Uploads the file to S3 bucket after clearing the contents in the folder
+        Uploads the raw files and the processed outputs of self.status to the S3 bucket, all at the same time
+        :param s3: S3 object shared by several retailers, a new one is created when not given
+        :return: list of upload results (see S3.bulk_upload), raw files first
         """
-        s3 = S3()
+        if s3 is None:
+            s3 = aws.S3()
         if not self.status:
             logging.info("No matching data Found! Skipping file upload to S3")
-            return
+            return []
 
         raw_files = set()
         for item in self.status:
             raw_files.add((item['local_path'], item['ID']))
 
-        logging.info("Uploading raw files to S3 ")
-
-        for raw_file in raw_files:
+        uploads = []
+        for raw_file in sorted(raw_files):
             logging.info(f"Uploading {raw_file[0]} to S3 ")
             s3_path = f"{app_config.s3_raw_dir}/{self.name}/{raw_file[1]}/{os.path.basename(raw_file[0])}"
-            s3.upload_file(raw_file[0], app_config.s3_bucket_name, s3_path)
-        logging.info("Uploading processed files to S3 ")
+            uploads.append({'filename': raw_file[0], 'key': s3_path, 'compress': app_config.s3_compress_raw_files})
 
         for item in self.status:
             if 'sheet_name' in item.keys():
@@ -124,102 +271,217 @@ class Retailer(ABC):
             else:
                 logging.info(f"Uploading output of file {os.path.basename(item['local_path'])} ")
 
-            s3.upload_dataframe(df=item['output_df'],
-                                bucket_name=app_config.s3_bucket_name,
-                                filename=item['s3_location'].replace(
-                                    f"s3://{app_config.s3_bucket_name}/", ""),
-                                file_format='json',
-                                compress=False,
-                                lowercase_headers=True)
+            filename = item['s3_location'].replace(f"s3://{app_config.s3_bucket_name}/", "")
+            if app_config.s3_file_format == 'parquet':
+                filename = f"{os.path.splitext(filename)[0]}.parquet"
+            schema = sales_table_schema if item['report_type'] == 'sales' else inventory_table_schema
+            uploads.append({'df': item['output_df'],
+                            'filename': filename,
+                            'file_format': app_config.s3_file_format,
+                            'compress': app_config.s3_compression,
+                            'lowercase_headers': True,
+                            'schema': schema})
+
+        results = s3.bulk_upload(uploads, app_config.s3_bucket_name, max_workers=app_config.s3_upload_workers)
+
+        for item, result in zip(self.status, results[len(raw_files):]):
+            if result['success']:
+                item['s3_location'] = f"s3://{app_config.s3_bucket_name}/{result['key']}"
+        for result in results:
+            logging.info(f"Uploaded {result['key']} in {result['seconds']}s, size {result['size']}, "
+                         f"ETag {result['etag']}")
+
+        failed = [upload.get('key') or upload['filename'] for upload, result in zip(uploads, results)
+                  if not result['success']]
+        if failed:
+            from airflow import AirflowException
+            raise AirflowException(f"Failed uploading to S3: {', '.join(failed)}")
+        return results
+
+    @staticmethod
+    def _get_tables(type='staging'):
+        """
+        :param type: 'staging'
+        :return: tuple (sales_table, inventory_table)
+        """
+        if type == 'final':
+            return app_config.redshift_final_sales_table, app_config.redshift_final_inventory_table
+        return app_config.redshift_stg_sales_table, app_config.redshift_stg_inventory_table
+
+    @staticmethod
+    def _get_table_ddl(table_name, table_type):
+        """
+        CREATE TABLE statement of a sales or inventory table with the keys and encodings set in the config
+        :param table_name: 'dev_retail_data.retail_sales'
+        :param table_type: 'sales'
+        """
+        schema = sales_table_schema if table_type == 'sales' else inventory_table_schema
+        return build_table_ddl(table_name, schema, **app_config.redshift_table_keys(table_type))
 
     @classmethod
     def create_tables(cls, type='staging'):
         """
         Create staging tables for sales and inventory in redshift database
+        Distribution, sort keys and column encodings are taken from the config
         :param type: 'staging'
         """
         sales_sql = ''
         inventory_sql = ''
+        sales_table, invent_table = Retailer._get_tables(type)
         if type == 'final':
-            sales_table = app_config.redshift_final_sales_table
-            invent_table = app_config.redshift_final_inventory_table
             if app_config.drop_recreate_final_table:
                 sales_sql += f"DROP TABLE IF EXISTS {sales_table};"
                 inventory_sql += f"DROP TABLE IF EXISTS {invent_table};"
         else:
-            sales_table = app_config.redshift_stg_sales_table
-            invent_table = app_config.redshift_stg_inventory_table
             if app_config.drop_recreate_stg_table:
                 sales_sql += f"DROP TABLE IF EXISTS {sales_table};"
                 inventory_sql += f"DROP TABLE IF EXISTS {invent_table};"
 
-        sales_sql += sales_table_ddl.format(SALES_TABLE=sales_table)
-        inventory_sql += inventory_table_ddl.format(INVENTORY_TABLE=invent_table)
+        sales_sql += Retailer._get_table_ddl(sales_table, 'sales')
+        inventory_sql += Retailer._get_table_ddl(invent_table, 'inventory')
 
-        rdsft = Redshift(**app_config.redshift_creds)
-        logging.info(f"Creating {type} table {sales_table} (if it doesn't exists)")
-        success = rdsft.run_sql_command(sql_command=sales_sql, close_on_return=False)
-        if not success:
-            raise AirflowException(f'Failed creating {type} table {sales_table}')
+        with aws.Redshift(**app_config.redshift_creds) as rdsft:
+            logging.info(f"Creating {type} table {sales_table} (if it doesn't exists)")
+            success = rdsft.run_sql_command(sql_command=sales_sql, close_on_return=False)
+            if not success:
+                from airflow import AirflowException
+                raise AirflowException(f'Failed creating {type} table {sales_table}')
 
-        logging.info(f"Creating {type} table {invent_table} (if it doesn't exists)")
-        success = rdsft.run_sql_command(sql_command=inventory_sql, close_on_return=True)
-        if not success:
-            raise AirflowException(f'Failed creating {type} table {invent_table}')
+            logging.info(f"Creating {type} table {invent_table} (if it doesn't exists)")
+            success = rdsft.run_sql_command(sql_command=inventory_sql, close_on_return=False)
+            if not success:
+                from airflow import AirflowException
+                raise AirflowException(f'Failed creating {type} table {invent_table}')
 
     @classmethod
-    def load_data(cls, s3_location, redshift_table):
+    def migrate_tables(cls, type='final'):
+        """
+        Rebuilds existing tables with the keys and encodings set in the config using a deep copy:
+        the data is copied to a new table which then replaces the old one, all in one transaction
+        :param type: 'final'
+        """
+        sales_table, invent_table = Retailer._get_tables(type)
+        with aws.Redshift(**app_config.redshift_creds) as rdsft:
+            for table_name, table_type in [(sales_table, 'sales'), (invent_table, 'inventory')]:
+                schema = sales_table_schema if table_type == 'sales' else inventory_table_schema
+                columns = ', '.join(f'"{column.name}"' for column in schema)
+                short_name = table_name.split('.')[-1]
+                migrate_sql = f"""
+                BEGIN;
+                DROP TABLE IF EXISTS {table_name}_new;
+                {Retailer._get_table_ddl(f"{table_name}_new", table_type)}
+                INSERT INTO {table_name}_new ({columns}) SELECT {columns} FROM {table_name};
+                ALTER TABLE {table_name} RENAME TO {short_name}_old;
+                ALTER TABLE {table_name}_new RENAME TO {short_name};
+                DROP TABLE {table_name}_old;
+                COMMIT;"""
+                logging.info(f"Migrating {type} table {table_name}")
+                success = rdsft.run_sql_command(sql_command=migrate_sql, close_on_return=False)
+                if not success:
+                    from airflow import AirflowException
+                    raise AirflowException(f'Failed migrating {type} table {table_name}')
+                logging.info(f"Successfully migrated {type} table {table_name}")
+
+    @classmethod
+    def load_data(cls, s3_location, redshift_table, compression=None, file_format='json', manifest=False):
         """
         Load data to tables in Redshift database from S3 bucket
         :param s3_location: 's3://olaplex-retail-data-test/ADI/json/17846482fb05eabc/
                                 Inventory_1616086825_ADI Inventory Report 2021-01-31.json'
         :param redshift_table: 'dev_retail_data.tmp_sales_adi'
+        :param compression: 'gzip', 'zstd' or None, must match the compression of the files
+        :param file_format: 'json' or 'parquet'. Parquet columns are matched by position to the table columns
+        :param manifest: True if s3_location is a manifest file listing the files to load
         :return sql_success: True
         """
-        rdsft = Redshift(**app_config.redshift_creds)
+        if file_format == 'parquet':
+            # parquet files carry their own compression and are cut to the column lengths when written
+            format_options = "FORMAT AS PARQUET"
+        else:
+            compression_option = compression.upper() if compression else ''
+            format_options = f"""TRUNCATECOLUMNS            
+            json 'auto' {compression_option}"""
+        if manifest:
+            format_options += "\n            MANIFEST"
         load_sql = f"""
             BEGIN;
             TRUNCATE TABLE {redshift_table};
             COPY {redshift_table} 
             FROM '{s3_location}'
             IAM_ROLE '{app_config.redshift_iam_role}' 
-            TRUNCATECOLUMNS            
-            json 'auto'; 
+            {format_options}; 
             COMMIT;"""
         logging.info(f"Running command: {load_sql}")
-        sql_success = rdsft.run_sql_command(load_sql)
+        with aws.Redshift(**app_config.redshift_creds) as rdsft:
+            sql_success = rdsft.run_sql_command(load_sql, close_on_return=False)
+            if sql_success:
+                # pg_last_copy_id() is the last COPY of the session, the query has to run on the same connection
+                loaded_df = rdsft.read_sql("SELECT TRIM(filename) AS filename, SUM(lines_scanned) AS rows_loaded "
+                                           "FROM stl_load_commits WHERE query = pg_last_copy_id() "
+                                           "GROUP BY 1 ORDER BY 1;", close_on_return=False)
         if sql_success:
+            for filename, rows_loaded in loaded_df.itertuples(index=False):
+                logging.info(f"Loaded {rows_loaded} rows to {redshift_table} from {filename}")
             logging.info(f"Successfully loaded data to {redshift_table} from {s3_location}")
         else:
+            from airflow import AirflowException
             raise AirflowException(f"Error loading data to {redshift_table} from {s3_location}")
 
         return sql_success
 
+    @classmethod
+    def write_manifest(cls, s3, objects, table_type):
+        """
+        Writes the COPY manifest listing the files to load. The content length is required for parquet files.
+        :param s3: S3
+        :param objects: list of S3 objects (dictionaries with Key and Size)
+        :param table_type: 'sales'
+        :return: s3 location of the manifest
+        """
+        manifest = {'entries': [{'url': f"s3://{app_config.s3_bucket_name}/{obj['Key']}",
+                                 'mandatory': True,
+                                 'meta': {'content_length': obj['Size']}} for obj in objects]}
+        key = f"{app_config.s3_manifest_dir}/{table_type}_{datetime.now().strftime('%Y%m%d%H%M%S')}.manifest"
+        if not s3.write_bytes_to_s3(json.dumps(manifest).encode('utf-8'), app_config.s3_bucket_name, key):
+            from airflow import AirflowException
+            raise AirflowException(f"Error writing the {table_type} manifest {key}")
+        return f"s3://{app_config.s3_bucket_name}/{key}"
+
     @classmethod
     def load_to_staging_tables(cls):
         """
         Loading data to staging tables if there are files present in the unprocessed sales/inventory folders
+        :return: list of the loaded S3 objects
         """
-        s3_bucket = S3()
+        s3_bucket = aws.S3()
         Retailer.create_tables(type='staging')
-        sales_s3_loc = f"s3://{app_config.s3_bucket_name}/{app_config.s3_unprocessed_dir}/sales/"
-        inventory_s3_loc = f"s3://{app_config.s3_bucket_name}/{app_config.s3_unprocessed_dir}/inventory/"
-
-        if s3_bucket.is_folder_present(bucket_name=app_config.s3_bucket_name,
-                                       prefix=f'{app_config.s3_unprocessed_dir}/sales'):
-            logging.info(f"Loading sales data from {sales_s3_loc} to sales staging table")
-            Retailer.load_data(sales_s3_loc, app_config.redshift_stg_sales_table)
 
-        else:
-            logging.info("No unprocessed sales data found!")
+        # one listing of the unprocessed folder, Redshift gets the exact file list through a manifest
+        unprocessed = s3_bucket.get_matching_objects(bucket_name=app_config.s3_bucket_name,
+                                                     prefix=f'{app_config.s3_unprocessed_dir}/')
+        loads = []
+        for table_type, redshift_table in [('sales', app_config.redshift_stg_sales_table),
+                                           ('inventory', app_config.redshift_stg_inventory_table)]:
+            prefix = f'{app_config.s3_unprocessed_dir}/{table_type}/'
+            objects = [obj for obj in unprocessed if obj['Key'].startswith(prefix) and not obj['Key'].endswith('/')]
+            if objects:
+                manifest = Retailer.write_manifest(s3_bucket, objects, table_type)
+                logging.info(f"Loading {len(objects)} {table_type} files listed in {manifest} "
+                             f"to {table_type} staging table")
+                loads.append((manifest, redshift_table))
+            else:
+                logging.info(f"No unprocessed {table_type} data found!")
 
-        if s3_bucket.is_folder_present(bucket_name=app_config.s3_bucket_name,
-                                       prefix=f'{app_config.s3_unprocessed_dir}/inventory'):
-            logging.info(f"Loading inventory data from {inventory_s3_loc} to inventory staging table")
-            Retailer.load_data(inventory_s3_loc, app_config.redshift_stg_inventory_table)
+        # sales and inventory are loaded at the same time, each on its own connection
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(Retailer.load_data, manifest, redshift_table, app_config.s3_compression,
+                                       app_config.s3_file_format, True)
+                       for manifest, redshift_table in loads]
+            for future in futures:
+                future.result()
 
-        else:
-            logging.info("No unprocessed inventory data found!")
+        return [obj for obj in unprocessed if obj['Key'].startswith((f'{app_config.s3_unprocessed_dir}/sales/',
+                                                                     f'{app_config.s3_unprocessed_dir}/inventory/'))]
 
     def _map_file(self, report_dict):
         """
@@ -243,9 +505,8 @@ class Retailer(ABC):
         # calling the map_destination method from sub class which will be implemented in the sub class
         try:
             if file_extension.lower() in [".xlsx", ".xls"]:
-                xl = pd.read_excel(report_dict["local_path"], sheet_name=None)
-                sheet_list = xl.keys()
-                for sheet_name in sheet_list:
+                workbook = self.get_workbook(report_dict["local_path"])
+                for sheet_name in workbook.sheet_names:
                     self.map_destination(report_dict, file_name, sheet_name)
 
             elif file_extension == ".csv":
@@ -258,6 +519,50 @@ class Retailer(ABC):
                 exc=e,
                 report_dict=report_dict
             )
+        finally:
+            self.release_workbook(report_dict["local_path"])
+
+    def get_workbook(self, local_path):
+        """
+        Returns the workbook handle of a report. The file is opened on the first call and the same handle is
+        shared by _map_file, map_destination, the parsers and the cell lookup helpers until the report is released
+        :param local_path: '_data\\ADI\\1616101111_ADI Inventory Report 2020-12-31.xlsx'
+        :return: Workbook
+        """
+        if local_path not in self.workbooks:
+            self.workbooks[local_path] = Workbook(local_path, reader=app_config.excel_reader)
+        return self.workbooks[local_path]
+
+    def get_csv_file(self, local_path, encoding='utf-8'):
+        """
+        Returns the CSV handle of a report, the top lines of the file are shared by the metadata lookups until the
+        report is released
+        :param local_path: '_data\\Baldacci\\1616101111_tb-rapport 2021 02.csv'
+        :param encoding: 'cp1252'
+        :return: CsvFile
+        """
+        if local_path not in self.csv_files:
+            self.csv_files[local_path] = CsvFile(local_path, encoding=encoding)
+        return self.csv_files[local_path]
+
+    def release_workbook(self, local_path):
+        """
+        Closes the workbook handle of a report and drops its parsed sheets and CSV head lines
+        :param local_path: '_data\\ADI\\1616101111_ADI Inventory Report 2020-12-31.xlsx'
+        """
+        self.csv_files.pop(local_path, None)
+        workbook = self.workbooks.pop(local_path, None)
+        if workbook:
+            workbook.close()
+
+    @staticmethod
+    def get_table_columns(report_type):
+        """
+        :param report_type: 'sales'
+        :return: ['record_id', 'report_id', ...] columns of the table the report type is loaded into
+        """
+        schema = sales_table_schema if report_type == 'sales' else inventory_table_schema
+        return [column.name for column in schema]
 
     @abstractmethod
     def map_destination(self, report_dict, file_name, sheet_name=None):
@@ -265,23 +570,35 @@ class Retailer(ABC):
         pass
 
     @classmethod
-    def archive_s3_data(cls):
+    def archive_s3_data(cls, objects=None):
         """
         This is a class method used to move unprocessed data to processed folder
         after adding to the redshift tables
+        :param objects: the S3 objects loaded by load_to_staging_tables, everything in the unprocessed folder if None
         """
-        if os.environ.get('LC_CTYPE', '') == 'UTF-8':
-            os.environ['LC_CTYPE'] = 'en_US.UTF-8'
-        processed = f's3://{app_config.s3_bucket_name}/{app_config.s3_processed_dir}/'
-        unprocessed = f's3://{app_config.s3_bucket_name}/{app_config.s3_unprocessed_dir}/'
-        s3 = S3()
-        if s3.is_folder_present(bucket_name=app_config.s3_bucket_name,
-                                prefix=app_config.s3_unprocessed_dir):
-            driver = create_clidriver()
-            logging.info(f"Archiving the files on S3 ie: Moving From {unprocessed} to {processed} ")
-            driver.main(f"s3 mv {unprocessed} {processed} --recursive".split())
-        else:
-            pass
+        processed = f'{app_config.s3_processed_dir}/'
+        unprocessed = f'{app_config.s3_unprocessed_dir}/'
+        s3 = aws.S3()
+        logging.info(f"Archiving the files on S3 ie: Moving From {unprocessed} to {processed} ")
+        moved, failed = s3.move_prefix(bucket_name=app_config.s3_bucket_name,
+                                       source_prefix=unprocessed,
+                                       destination_prefix=processed,
+                                       objects=objects)
+        if failed:
+            from airflow import AirflowException
+            raise AirflowException(f"Failed archiving {failed} files from {unprocessed}. Run the archive again to "
+                                   f"move the remaining files.")
+
+    def _record_output(self, df, report_type, sheet=None):
+        """
+        Keeps a copy of a parsed sheet, before the metadata is added, for the parsed sheet cache.
+        Every append_metadata, the ones overridden in the sub classes included, calls it first.
+        :param df: DataFrame
+        :param report_type: 'inventory'
+        :param sheet: 'Inventory'
+        """
+        if self._parsed_outputs is not None:
+            self._parsed_outputs.append((sheet, report_type, df.copy()))
 
     def append_metadata(self, df, report_dict, report_type, sheet=None):
         """
@@ -307,6 +624,8 @@ class Retailer(ABC):
         :param report_type: 'inventory'
         :param sheet: 'Inventory'
         """
+        self._record_output(df, report_type, sheet)
+
         file_name = os.path.basename(report_dict['local_path'])
 
         df["retailer_id"] = self.retailer_id
@@ -316,29 +635,13 @@ class Retailer(ABC):
         df_obj = df.select_dtypes(['object'])
         df[df_obj.columns] = df_obj.apply(lambda x: x.str.strip())
 
-        uuid_list = []
-        report_id_list = []
-        for index in range(len(df)):
-            md5_text = ''.join([val for val in df.iloc[index].astype(str).values])
-            uuid_list.append(generate_uuid(md5_text))
-
-            report_id_list.append(
-                generate_report_id(
-                    file_name=file_name,
-                    reporting_period=df.reporting_period.iloc[index],
-                    end_date=df.reporting_period_end.iloc[index] if report_type == 'sales'
-                    else df.effective_date.iloc[index],
-                    retailer_id=self.retailer_id,
-                    num_records=len(df),
-                    sheet_name=sheet
-                )
-            )
-
+        uuid_list, report_id_list, record_id_list = generate_row_ids(df=df,
+                                                                     file_name=file_name,
+                                                                     report_type=report_type,
+                                                                     sheet_name=sheet)
         df["uuid"] = uuid_list
         df['report_id'] = report_id_list
-
-        df['record_id'] = [generate_record_id(report_id=report_id,row_number=index)
-                           for index, report_id in enumerate(df.report_id)]
+        df['record_id'] = record_id_list
 
         df["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         df["file_name"] = file_name
@@ -373,6 +676,7 @@ class Retailer(ABC):
         :param send_email: 'reports@olaplex.com'
         """
         logging.error(exc)
+        self.failed_reports.add(report_dict['local_path'])
         file_name = os.path.basename(report_dict['local_path'])
         report_dict['Error in file'] = file_name
         report_dict['Error in sheet'] = sheet
@@ -393,7 +697,7 @@ class Retailer(ABC):
             message += "\nThank You"
             email_config = app_config.sender_email_config.copy()
             email_config['download_path'] = self.download_path
-            gmail = Gmail(**email_config)
+            gmail = emails.Gmail(**email_config)
             gmail.send_email(
                 from_email=app_config.sender_email_address,
                 to_email=app_config.receiver_email_address,
@@ -401,46 +705,83 @@ class Retailer(ABC):
                 message_text=message,
                 attachment=[report_dict['local_path']]
             )
-        error_file = os.path.join(self.download_path, 'error.log')
+        error_file = self.error_file
         with open(error_file, 'a') as f:
             f.write(f"File name: {file_name}\n"
                     f"Sheet name: {sheet}\n"
                     f"Traceback: {traceback.format_exc()}")
         logging.info(f"Error log written to {error_file}")
 
+    @staticmethod
+    def _get_final_load_sql(stg_table, final_table, schema):
+        """
+        Builds the anti-join load of a final table, columns are listed in the table order of the DDL
+        :param stg_table: 'dev_retail_data.stg_retail_sales'
+        :param final_table: 'dev_retail_data.retail_sales'
+        :param schema: sales_table_schema
+        :return: sql command
+        """
+        return load_final_table_sql.format(
+            STAGING_DEDUP_TABLE=f"{final_table.split('.')[-1]}_dedup",
+            REDSHIFT_STG_TABLE=stg_table,
+            REDSHIFT_FINAL_TABLE=final_table,
+            COLUMNS=', '.join(f'"{column.name}"' for column in schema),
+            STAGING_COLUMNS=', '.join(f's."{column.name}"' for column in schema))
+
     @classmethod
     def load_to_final_table(cls, final_table=None):
         """
-        This method loads data from staging tables to final tables. Here we handle the deduplicate data using
-        FIRST VALUE window function.
+        This method loads data from staging tables to final tables. Staging data is deduplicated with ROW_NUMBER
+        and rows already in the final table are skipped with an anti-join on the loaded reports.
+        The former FIRST VALUE / NOT IN queries are used when FINAL_LOAD_STRATEGY is legacy.
         :param final_table: 'retail_sales'
         """
-        rdsft = Redshift(**app_config.redshift_creds)
         Retailer.create_tables(type='final')  # Creates empty final tables if they don't exist
-
-        if final_table is None or final_table.lower() == 'sales':
-            logging.info(f"Loading Data to {app_config.redshift_final_sales_table}")
-            sql_success = rdsft.run_sql_command(load_retail_sales_sql.format(
-                REDSHIFT_STG_SALES_TABLE=app_config.redshift_stg_sales_table,
-                REDSHIFT_FINAL_SALES_TABLE=app_config.redshift_final_sales_table))
-
-            if sql_success:
-                logging.info(f"Successfully Loaded data to {app_config.redshift_final_sales_table} from "
-                             f"{app_config.redshift_stg_sales_table}")
-            else:
-                logging.error(f"Error Loading data to {app_config.redshift_final_sales_table} from "
-                              f"{app_config.redshift_stg_sales_table}")
-
-        if final_table is None or final_table.lower() == 'inventory':
-            logging.info(f"Loading Data to  {app_config.redshift_final_inventory_table}")
-            sql_success = rdsft.run_sql_command(load_retail_inventory_sql.format(
-                REDSHIFT_STG_INVENTORY_TABLE=app_config.redshift_stg_inventory_table,
-                REDSHIFT_FINAL_INVENTORY_TABLE=app_config.redshift_final_inventory_table))
-
-            if sql_success:
-                logging.info(
-                    f"Successfully Loaded data to {app_config.redshift_final_inventory_table} from "
-                    f"{app_config.redshift_stg_inventory_table}")
-            else:
-                logging.error(f"Error Loading data to {app_config.redshift_final_inventory_table} from "
-                              f"{app_config.redshift_stg_inventory_table}")
+        legacy = app_config.final_load_strategy == 'legacy'
+        failed = []
+
+        with aws.Redshift(**app_config.redshift_creds) as rdsft:
+            if final_table is None or final_table.lower() == 'sales':
+                logging.info(f"Loading Data to {app_config.redshift_final_sales_table}")
+                if legacy:
+                    load_sql = load_retail_sales_sql.format(
+                        REDSHIFT_STG_SALES_TABLE=app_config.redshift_stg_sales_table,
+                        REDSHIFT_FINAL_SALES_TABLE=app_config.redshift_final_sales_table)
+                else:
+                    load_sql = Retailer._get_final_load_sql(app_config.redshift_stg_sales_table,
+                                                            app_config.redshift_final_sales_table,
+                                                            sales_table_schema)
+                sql_success = rdsft.run_sql_command(load_sql, close_on_return=False)
+
+                if sql_success:
+                    logging.info(f"Successfully Loaded data to {app_config.redshift_final_sales_table} from "
+                                 f"{app_config.redshift_stg_sales_table}")
+                else:
+                    logging.error(f"Error Loading data to {app_config.redshift_final_sales_table} from "
+                                  f"{app_config.redshift_stg_sales_table}")
+                    failed.append(app_config.redshift_final_sales_table)
+
+            if final_table is None or final_table.lower() == 'inventory':
+                logging.info(f"Loading Data to  {app_config.redshift_final_inventory_table}")
+                if legacy:
+                    load_sql = load_retail_inventory_sql.format(
+                        REDSHIFT_STG_INVENTORY_TABLE=app_config.redshift_stg_inventory_table,
+                        REDSHIFT_FINAL_INVENTORY_TABLE=app_config.redshift_final_inventory_table)
+                else:
+                    load_sql = Retailer._get_final_load_sql(app_config.redshift_stg_inventory_table,
+                                                            app_config.redshift_final_inventory_table,
+                                                            inventory_table_schema)
+                sql_success = rdsft.run_sql_command(load_sql, close_on_return=False)
+
+                if sql_success:
+                    logging.info(
+                        f"Successfully Loaded data to {app_config.redshift_final_inventory_table} from "
+                        f"{app_config.redshift_stg_inventory_table}")
+                else:
+                    logging.error(f"Error Loading data to {app_config.redshift_final_inventory_table} from "
+                                  f"{app_config.redshift_stg_inventory_table}")
+                    failed.append(app_config.redshift_final_inventory_table)
+
+        if failed:
+            from airflow import AirflowException
+            raise AirflowException(f"Error loading data to {', '.join(failed)}")
@@ -0,0 +1,130 @@
+import os
+import io
+import csv
+import logging
+import threading
+from types import MappingProxyType
+
+RETAILER_INFO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'retailer_info.csv')
+RETAILER_INFO_COLUMNS = ('retailer_class_name', 'retailer_id', 'retailer_internal_id', 'email_label',
+                         'file_extensions')
+
+
+class RetailerRegistry:
+
+    def __init__(self, rows, source='retailer_info.csv'):
+        """
+        Retailer details indexed by class name, read-only once loaded.
+        A class with several rows (one email label shared by several legal entities, eg: Sephora US and CA) gets
+        empty retailer_id and retailer_internal_id, the parser sets them from the report content.
+        :param rows: list of dictionaries with the RETAILER_INFO_COLUMNS
+        :param source: 'retailer_info.csv', used in the error messages
+        """
+        grouped = {}
+        for line, row in enumerate(rows, start=2):
+            missing = [column for column in RETAILER_INFO_COLUMNS if not str(row.get(column) or '').strip()]
+            if missing:
+                raise ValueError(f"Invalid retailer info in {source} line {line}, missing {', '.join(missing)}")
+            if not str(row['retailer_internal_id']).strip().isdigit():
+                raise ValueError(f"Invalid retailer info in {source} line {line}, retailer_internal_id "
+                                 f"{row['retailer_internal_id']} is not a number")
+            grouped.setdefault(row['retailer_class_name'].strip(), []).append(row)
+
+        retailers = {}
+        for class_name, records in grouped.items():
+            email_labels = {record['email_label'].strip() for record in records}
+            if len(email_labels) > 1:
+                raise ValueError(f"Invalid retailer info in {source}, {class_name} has several email labels "
+                                 f"{', '.join(sorted(email_labels))}")
+            single = len(records) == 1
+            retailers[class_name] = MappingProxyType({
+                'retailer_internal_id': str(records[0]['retailer_internal_id']).strip() if single else '',
+                'retailer_id': records[0]['retailer_id'].strip() if single else '',
+                'email_label': email_labels.pop(),
+                'file_extensions': tuple(records[0]['file_extensions'].strip().split(';')),
+            })
+        self._retailers = MappingProxyType(retailers)
+        self.source = source
+
+    @classmethod
+    def from_csv(cls, content, source='retailer_info.csv'):
+        """
+        :param content: CSV text with the RETAILER_INFO_COLUMNS header
+        """
+        reader = csv.DictReader(io.StringIO(content))
+        missing = [column for column in RETAILER_INFO_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Invalid retailer info in {source}, missing columns {', '.join(missing)}")
+        return cls(list(reader), source=source)
+
+    @classmethod
+    def from_file(cls, path=RETAILER_INFO_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_csv(f.read(), source=path)
+
+    @classmethod
+    def from_airflow_variable(cls, name):
+        """
+        :param name: 'retailer_info', Airflow variable holding the CSV content
+        """
+        from airflow.models import Variable
+        return cls.from_csv(Variable.get(name), source=f"Airflow variable {name}")
+
+    @classmethod
+    def from_s3(cls, bucket_name, key):
+        from aws import S3
+        obj = S3().s3_client.get_object(Bucket=bucket_name, Key=key)
+        return cls.from_csv(obj['Body'].read().decode('utf-8'), source=f"s3://{bucket_name}/{key}")
+
+    def get(self, class_name):
+        """
+        :param class_name: 'ADI'
+        :return: read-only mapping {
+                                    'retailer_id': 'C033038 ADI srl',
+                                    'retailer_internal_id': '128883',
+                                    'email_label': 'Retail_Reports-ADI',
+                                    'file_extensions': ('xlsx',)
+                                   } or None if the retailer is not registered
+        """
+        return self._retailers.get(class_name)
+
+    def __contains__(self, class_name):
+        return class_name in self._retailers
+
+    def __len__(self):
+        return len(self._retailers)
+
+    @property
+    def class_names(self):
+        return tuple(self._retailers)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def load_retailer_registry():
+    """
+    Loads the registry from the source set in the config: the CSV file next to this module (default), an Airflow
+    variable or an S3 object
+    """
+    from config import app_config
+    source = app_config.retailer_info_source
+    if source == 'variable':
+        return RetailerRegistry.from_airflow_variable(app_config.retailer_info_variable)
+    elif source == 's3':
+        return RetailerRegistry.from_s3(app_config.s3_bucket_name, app_config.retailer_info_s3_key)
+    return RetailerRegistry.from_file(app_config.retailer_info_file or RETAILER_INFO_FILE)
+
+
+def get_retailer_registry():
+    """
+    :return: the RetailerRegistry of the process, loaded on the first call
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = load_retailer_registry()
+                logging.info(f"Loaded {len(_registry)} retailers from {_registry.source}")
+    return _registry
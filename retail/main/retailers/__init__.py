@@ -1,16 +1,17 @@
-from .adi import ADI
-from .aston_and_fincher import AstonAndFincher
-from .asos import ASOS
-from .amazon import AmazonUS, AmazonGB, AmazonDE, AmazonFR, AmazonES, AmazonCA
-from .baldacci import Baldacci
-from .bsg import BSG
-from .cult_beauty_old import CultBeautyOLD
-from .haircare_australia import HaircareAustralia
-from .jc_penney import JCPenney
-from .new_flag import NewFlag
-from .sally_beauty_mexico import SallyBeautyMexico
-from .sallyuk_produo import SallyUKProDuo
-from .salon_centric import SalonCentric
-from .thg import THG
-from .cult_beauty import CultBeauty
-from .sephora import Sephora
+from .registry import register_retailer, retailer_names, get_retailer_class, create_retailer, create_retailers
+
+__all__ = retailer_names()
+
+
+def __getattr__(name):
+    # retailer classes are loaded from the registry on first use, so a task running one retailer doesn't import
+    # the others
+    if name not in retailer_names():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    retailer_class = get_retailer_class(name)
+    globals()[name] = retailer_class
+    return retailer_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
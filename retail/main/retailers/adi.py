@@ -1,7 +1,7 @@
 import os
-import pandas as pd
 from datetime import datetime
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
 def get_effective_date(raw_date, file_name):
@@ -121,20 +121,14 @@ class ADI(Retailer):
         :param hardcoded_values: {hardcoded_values}
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_values)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet)
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
                 df["reporting_period_start"] = df["reporting_period_start"].dt.strftime("%Y-%m-%d")
                 df["reporting_period_end"] = df["reporting_period_end"].dt.strftime("%Y-%m-%d")
 
             else:
                 file_name = os.path.basename(report_dict['local_path'])
-                df.rename(columns=mapping_dict, inplace=True)
                 try:
                     df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
                 except:
@@ -142,9 +136,7 @@ class ADI(Retailer):
                                             df['effective_date']]
 
             # hardcoded fields
-            if hardcoded_values:
-                for key in hardcoded_values:
-                    df[key] = hardcoded_values[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,6 +1,6 @@
 import pandas as pd
 from datetime import datetime
-from retail.main.utils import str_to_num
+from retail.main.utils import to_number
 from retail.main.retailer import Retailer
 from retail.main.config import *
 
@@ -24,7 +24,7 @@ class Amazon(Retailer):
         :param date_format: "%m/%d/%y"
         :return: 2012-12-01, 2012-12-31
         """
-        df = pd.read_csv(input_file, nrows=0)
+        df = self.get_csv_file(input_file).head(nrows=0)
         reporting_period_str = None
         for item in df.columns:
             if item.startswith(identifier):
@@ -57,8 +57,8 @@ class Amazon(Retailer):
             if report_type == 'sales':
                 df = pd.read_csv(report_dict['local_path'], skiprows=1, usecols=self.sales_mapping.keys())
                 df.rename(columns=self.sales_mapping, inplace=True)
-                df["total_quantity"] = df["total_quantity"].apply(str_to_num)
-                df["total_value"] = df["total_value"].apply(str_to_num)
+                df["total_quantity"] = to_number(df["total_quantity"])
+                df["total_value"] = to_number(df["total_value"])
                 df['reporting_period_start'], df['reporting_period_end'] = self.get_reporting_periods(
                     input_file=report_dict['local_path'],
                     identifier='Viewing=',
@@ -67,9 +67,9 @@ class Amazon(Retailer):
             else:
                 df = pd.read_csv(report_dict['local_path'], skiprows=1, usecols=self.inventory_mapping.keys())
                 df.rename(columns=self.inventory_mapping, inplace=True)
-                df["quantity_warehouse"] = df["quantity_warehouse"].apply(str_to_num)
-                df["quantity_intransit"] = df["quantity_intransit"].apply(str_to_num)
-                df["value_warehouse"] = df["value_warehouse"].apply(str_to_num)
+                df["quantity_warehouse"] = to_number(df["quantity_warehouse"])
+                df["quantity_intransit"] = to_number(df["quantity_intransit"])
+                df["value_warehouse"] = to_number(df["value_warehouse"])
                 _, df['effective_date'] = self.get_reporting_periods(
                     input_file=report_dict['local_path'],
                     identifier='Viewing=',
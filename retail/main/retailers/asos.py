@@ -1,10 +1,10 @@
 import os
 import datetime
-import pandas as pd
 from zipfile import ZipFile
-from retail.main.utils import str_to_num
+from retail.main.utils import to_number
 from retail.main.config import app_config
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
 def get_start_date(file_name):
@@ -170,27 +170,19 @@ class ASOS(Retailer):
         :param hardcoded_dict: sales_hardcoded
         """
         try:
-            df_original = pd.read_excel(io=report_dict['local_path'],
-                                        skipfooter=1)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
-            df.rename(columns=mapping_dict, inplace=True)
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), 0, skipfooter=1)
 
             if report_type == 'sales':
-                df["total_quantity"] = df["total_quantity"].apply(str_to_num)
-                df["total_value"] = df["total_value"].apply(str_to_num)
+                df["total_quantity"] = to_number(df["total_quantity"])
+                df["total_value"] = to_number(df["total_value"])
                 df["reporting_period_start"] = get_start_date(report_dict['local_path'])
                 df["reporting_period_end"] = get_end_date(report_dict['local_path'])
 
             else:
                 df['effective_date'] = get_effective_date(report_dict['local_path'])
 
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,6 +1,6 @@
-import pandas as pd
 from datetime import datetime
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
 class AstonAndFincher(Retailer):
@@ -134,19 +134,13 @@ class AstonAndFincher(Retailer):
         :param data_types: dtypes_sales
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet, dtype=data_types)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_values, dtypes=data_types)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet)
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
                 df["reporting_period_start"] = df["reporting_period_start"].dt.strftime("%Y-%m-%d")
                 df["reporting_period_end"] = df["reporting_period_end"].dt.strftime("%Y-%m-%d")
 
             else:
-                df.rename(columns=mapping_dict, inplace=True)
                 try:
                     df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
                 except Exception as e:
@@ -154,9 +148,7 @@ class AstonAndFincher(Retailer):
                                             for i in df['effective_date']]
 
             # hardcoded fields
-            if hardcoded_values:
-                for key in hardcoded_values:
-                    df[key] = hardcoded_values[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,34 +1,23 @@
-import pandas as pd
 from datetime import datetime
 from retail.main.retailer import Retailer
-from retail.main.utils import str_to_num
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import to_number
 
 
-def get_start_date(filename):
-    df_temp = pd.read_csv(filepath_or_buffer=filename,
-                          delimiter=';',
-                          nrows=4,
-                          encoding='cp1252',
-                          usecols=[0])
+def get_start_date(csv_file):
+    df_temp = csv_file.head(nrows=4, delimiter=';', usecols=[0])
     start_date = df_temp.iloc[0].str.split(':')[0][1].split(' - ')[0].strip()
     return start_date
 
 
-def get_end_date(filename):
-    df_temp = pd.read_csv(filepath_or_buffer=filename,
-                          delimiter=';',
-                          nrows=4,
-                          encoding='cp1252',
-                          usecols=[0])
+def get_end_date(csv_file):
+    df_temp = csv_file.head(nrows=4, delimiter=';', usecols=[0])
     end_date = df_temp.iloc[0].str.split(':')[0][1].split(' - ')[1].strip()
     return end_date
 
 
-def get_effective_date(filename):
-    df_temp = pd.read_csv(filepath_or_buffer=filename,
-                          usecols=[0],
-                          encoding='cp1252',
-                          nrows=1)
+def get_effective_date(csv_file):
+    df_temp = csv_file.head(nrows=1, usecols=[0])
     string_val = df_temp.iloc[0].str.split(':')[0][1].strip()
     characters_to_remove = [' ', ',', '$', ';']
     for ch in characters_to_remove:
@@ -37,16 +26,6 @@ def get_effective_date(filename):
     return effective_date
 
 
-def parse_european_currency(value):
-    """
-    This method removes characters in the currency value
-    :param value: ' 111,84'
-    :return value: '111.84'
-    """
-    value = str(value).replace(',', '.').replace(' ', '')
-    return float(value)
-
-
 class Baldacci(Retailer):
     def __init__(self):
         super().__init__()
@@ -126,47 +105,32 @@ class Baldacci(Retailer):
         :param hardcoded_dict: sales_hardcoded
         """
         try:
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict)
             if report_type == 'sales':
-                df_original = pd.read_csv(filepath_or_buffer=report_dict['local_path'],
-                                          delimiter=';',
-                                          skiprows=4,
-                                          skipfooter=3,
-                                          encoding='cp1252',
-                                          usecols=mapping_dict.keys())
-                df = pd.DataFrame()
-                for col in df_original.columns:
-                    for k in mapping_dict.keys():
-                        if col.lower() == k.lower():
-                            df[k] = df_original[col]
-
-                df.rename(columns=mapping_dict, inplace=True)
-                df["total_quantity"] = df["total_quantity"].apply(str_to_num)
-                df["total_value"] = df["total_value"].apply(parse_european_currency)
-                df["reporting_period_start"] = get_start_date(report_dict['local_path'])
-                df["reporting_period_end"] = get_end_date(report_dict['local_path'])
+                df = spec.read_csv(report_dict['local_path'],
+                                   delimiter=';',
+                                   skiprows=4,
+                                   skipfooter=3,
+                                   encoding='cp1252')
+                df["total_quantity"] = to_number(df["total_quantity"])
+                df["total_value"] = to_number(df["total_value"], decimal=',')
+                csv_file = self.get_csv_file(report_dict['local_path'], encoding='cp1252')
+                df["reporting_period_start"] = get_start_date(csv_file)
+                df["reporting_period_end"] = get_end_date(csv_file)
                 df["product_name"] = [i.replace(',', '.') for i in df["product_name"]]
 
             else:
-                df_original = pd.read_csv(filepath_or_buffer=report_dict['local_path'],
-                                          delimiter=';',
-                                          skiprows=6,
-                                          skipfooter=3,
-                                          encoding='cp1252',
-                                          usecols=mapping_dict.keys())
-                df = pd.DataFrame()
-                for col in df_original.columns:
-                    for k in mapping_dict.keys():
-                        if col.lower() == k.lower():
-                            df[k] = df_original[col]
-
-                df.rename(columns=mapping_dict, inplace=True)
-                df["value_physical"] = df["value_physical"].apply(parse_european_currency)
-                df["effective_date"] = get_effective_date(report_dict['local_path'])
+                df = spec.read_csv(report_dict['local_path'],
+                                   delimiter=';',
+                                   skiprows=6,
+                                   skipfooter=3,
+                                   encoding='cp1252')
+                df["value_physical"] = to_number(df["value_physical"], decimal=',')
+                df["effective_date"] = get_effective_date(self.get_csv_file(report_dict['local_path'],
+                                                                            encoding='cp1252'))
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,33 +1,8 @@
 import os
 import logging
-import calendar
-import pandas as pd
-from datetime import date
 from retail.main.retailer import Retailer
-from retail.main.utils import str_to_num, get_retailer_info
-
-
-def get_start_date(year, month):
-    """
-    This method returns the start date of the report
-    :param year: '2021'
-    :param month: '04'
-    :return start_date: '2021-04-01'
-    """
-    start_date = date(year, month, 1).strftime("%Y-%m-%d")
-    return start_date
-
-
-def get_end_date(year, month):
-    """
-    This method returns the end date of the report
-    :param year: '2021'
-    :param month: '04'
-    :return end_date: '2021-04-30'
-    """
-    num_days = int(calendar.monthrange(year, month)[1])
-    end_date = date(year, month, num_days).strftime("%Y-%m-%d")
-    return end_date
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import to_number, map_unique, month_start, month_end
 
 
 def get_country(currency):
@@ -175,23 +150,23 @@ class BSG(Retailer):
         :param dtypes: dtypes_bsg
         """
         try:
-            df = pd.read_excel(io=report_dict['local_path'], sheet_name=sheet, dtype=dtypes)
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict, dtypes=dtypes,
+                                 table_columns=self.get_table_columns(report_type))
+            workbook = self.get_workbook(report_dict['local_path'])
 
             if report_type == 'sales':
-                df['reporting_period_start'] = df.apply(lambda x: get_start_date(x.Year, x.Month), axis=1)
-                df['reporting_period_end'] = df.apply(lambda x: get_end_date(x.Year, x.Month), axis=1)
+                df = spec.read_excel(workbook, sheet, extra_columns=['Year', 'Month'])
+                df['reporting_period_start'] = month_start(df.Year, df.Month)
+                df['reporting_period_end'] = month_end(df.Year, df.Month)
                 if sheet == 'BSG':
-                    df['Country'] = df.apply(lambda x: get_country(x.Currency), axis=1)
-                df.rename(columns=mapping_dict, inplace=True)
-                df["total_quantity"] = df["total_quantity"].apply(str_to_num)
-                df["total_value"] = df["total_value"].apply(str_to_num)
+                    df['Country'] = map_unique(get_country, df.currency)
+                df["total_quantity"] = to_number(df["total_quantity"])
+                df["total_value"] = to_number(df["total_value"])
 
             else:
-                pass
+                df = spec.read_excel(workbook, sheet)
 
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,23 +1,22 @@
 import logging
 import os
 from datetime import datetime, date, timedelta
-import pandas as pd
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 from airflow import AirflowException
 
 
-def get_reporting_period_start(file_path, sheetname):
+def get_reporting_period_start(workbook, sheetname):
     """
     This method returns the reporting_period_start of a weekly report
-    :param file_path: 'OLAPLEX Total Weekly Sales - March 2021.xlsx'
+    :param workbook: Workbook('OLAPLEX Total Weekly Sales - March 2021.xlsx')
     :param sheetname: 'wc 21st March'
     :return: '2021-03-21'
     """
-    file_name = os.path.basename(file_path)
+    file_name = os.path.basename(workbook.path)
     file_date = datetime.strptime(file_name.split('-')[1].strip().replace('.xlsx', ''), "%B %Y")
 
-    df = pd.read_excel(file_path, nrows=1, usecols=[0], sheet_name=sheetname)
-    value = str(df.columns[0])  # Eg: Total Weekly Sales - wc 21st March 2021
+    value = str(workbook.head(sheetname, nrows=1).iloc[0, 0])  # Eg: Total Weekly Sales - wc 21st March 2021
     r_date = value.split('wc ')[1]  # 21st March 2021
 
     characters_to_remove = ['rd', 'th', 'nd', 'st']
@@ -94,12 +93,11 @@ class CultBeauty(Retailer):
         # calling the map_destination method from sub class which will be implemented in the sub class
         try:
             if file_extension.lower() in [".xlsx", ".xls"]:
-                xl = pd.read_excel(report_dict["local_path"], sheet_name=None)
-                sheet_list = xl.keys()
-                sheet_processed = list(sheet_list)[0]
-                for sheet_name in list(sheet_list):
-                    temp_df = pd.read_excel(io=report_dict["local_path"], sheet_name=sheet_name, skiprows=1,
-                                            skipfooter=1)
+                workbook = self.get_workbook(report_dict["local_path"])
+                sheet_list = workbook.sheet_names
+                sheet_processed = sheet_list[0]
+                for sheet_name in sheet_list:
+                    temp_df = workbook.parse(sheet_name, skiprows=1, skipfooter=1)
                     sheet_processed = sheet_name if not temp_df.empty else sheet_processed
 
                 self.map_destination(report_dict, file_name, sheet_processed)
@@ -111,6 +109,8 @@ class CultBeauty(Retailer):
                 exc=e,
                 report_dict=report_dict
             )
+        finally:
+            self.release_workbook(report_dict["local_path"])
 
     def map_destination(self, report_dict, file_name, sheet_name=None):
         """
@@ -160,12 +160,9 @@ class CultBeauty(Retailer):
         """
         try:
             file_name = os.path.basename(report_dict["local_path"])
-            df_original = pd.read_excel(report_dict['local_path'], sheet, skiprows=[0], skipfooter=1)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            workbook = self.get_workbook(report_dict['local_path'])
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict)
+            df = spec.read_excel(workbook, sheet, skiprows=1, skipfooter=1)
 
             if df.empty:
                 logging.info(f"""Empty Sheet encountered
@@ -175,14 +172,11 @@ class CultBeauty(Retailer):
                 """)
                 return None
 
-            df.rename(columns=mapping_dict, inplace=True)
-            df["reporting_period_start"] = get_reporting_period_start(report_dict['local_path'], sheet)
+            df["reporting_period_start"] = get_reporting_period_start(workbook, sheet)
             df["reporting_period_end"] = df["reporting_period_start"].apply(get_reporting_period_end)
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,7 +1,7 @@
-import pandas as pd
 import sys
 sys.path.append('..')
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
 class CultBeautyOLD(Retailer):
@@ -39,21 +39,14 @@ class CultBeautyOLD(Retailer):
 
     def parse_sales_inventory(self, report_dict, sheet, report_type, mapping_dict, hardcoded_dict):
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet, skiprows=[0], skipfooter=1)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet, skiprows=[0], skipfooter=1)
 
-            df.rename(columns=mapping_dict, inplace=True)
             df["reporting_period_start"] = df["reporting_period_start"].dt.strftime("%Y-%m-%d")
             df["reporting_period_end"] = df["reporting_period_end"].dt.strftime("%Y-%m-%d")
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
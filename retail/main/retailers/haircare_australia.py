@@ -1,7 +1,7 @@
-import pandas as pd
 from datetime import datetime
 from retail.main.retailer import Retailer
-from retail.main.utils import get_standard_date
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import standard_dates
 
 
 class HaircareAustralia(Retailer):
@@ -114,22 +114,19 @@ class HaircareAustralia(Retailer):
         :param hardcoded_values: aus_hardcoded
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_values)
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
-                df["reporting_period_start"] = df["reporting_period_start"].apply(get_standard_date)
-                df["reporting_period_end"] = df["reporting_period_end"].apply(get_standard_date)
+                df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet,
+                                     extra_columns=['Sub Region Code', 'Sub Region Name'])
+                df["reporting_period_start"] = standard_dates(df["reporting_period_start"])
+                df["reporting_period_end"] = standard_dates(df["reporting_period_end"])
 
                 df['note'] = [f"Sub Region Code = {x}; Sub Region Name = {y}"
-                              for x, y in zip(df_original['Sub Region Code'], df_original['Sub Region Name'])]
+                              for x, y in zip(df['Sub Region Code'], df['Sub Region Name'])]
+                df = df.drop(columns=['Sub Region Code', 'Sub Region Name'])
 
             else:
-                df.rename(columns=mapping_dict, inplace=True)
+                df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet)
                 try:
                     df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
                 except Exception as e:
@@ -137,9 +134,7 @@ class HaircareAustralia(Retailer):
                                             for i in df['effective_date']]
 
             # hardcoded fields
-            if hardcoded_values:
-                for key in hardcoded_values:
-                    df[key] = hardcoded_values[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
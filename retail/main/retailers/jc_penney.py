@@ -1,15 +1,15 @@
-import pandas as pd
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
-def get_reporting_period(file_name):
+def get_reporting_period(workbook):
     """
     This method returns the reporting week according to the first row value in file
-    :param file_name: 'Merchandise.xlsx'
+    :param workbook: Workbook('Merchandise.xlsx')
     :return report_week: 'Week 14, 2021'
     """
-    df_temp = pd.read_excel(file_name, nrows=2, usecols=[1])
-    report_week = str(df_temp.iloc[1]).split('|')[1].strip()
+    # the reporting week is in column B of the third row
+    report_week = str(workbook.head(nrows=3).iloc[2, 1]).split('|')[1].strip()
     return report_week
 
 
@@ -143,32 +143,25 @@ class JCPenney(Retailer):
         :param hardcoded_dict: sales_merchandise_hardcoded
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet, skiprows=[0, 1, 2, 3, 4, 6])
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            workbook = self.get_workbook(report_dict['local_path'])
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict)
+            df = spec.read_excel(workbook, sheet, skiprows=[0, 1, 2, 3, 4, 6])
 
-            report_week = get_reporting_period(report_dict['local_path'])
+            report_week = get_reporting_period(workbook)
 
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
                 df["reporting_period_start"] = report_week
                 df["reporting_period_end"] = report_week
                 df_obj = df.select_dtypes(['object'])
                 df[df_obj.columns] = df_obj.apply(lambda x: x.str.strip())
 
             else:
-                df.rename(columns=mapping_dict, inplace=True)
                 df["effective_date"] = report_week
                 if 'plant_name' in df.columns:
                     df["plant_name"] = [x.strip() for x in df.plant_name]
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,7 +1,7 @@
-import pandas as pd
 from datetime import datetime
 
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
 
 
 class NewFlag(Retailer):
@@ -110,19 +110,13 @@ class NewFlag(Retailer):
         :param hardcoded_values: sales_hardcoded_values
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_values)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet)
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
                 df["reporting_period_start"] = df["reporting_period_start"].dt.strftime("%Y-%m-%d")
                 df["reporting_period_end"] = df["reporting_period_end"].dt.strftime("%Y-%m-%d")
 
             else:
-                df.rename(columns=mapping_dict, inplace=True)
                 try:
                     df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
                 except Exception as e:
@@ -131,9 +125,7 @@ class NewFlag(Retailer):
                 df['country'] = df['plant_id']
 
             # hardcoded fields
-            if hardcoded_values:
-                for key in hardcoded_values:
-                    df[key] = hardcoded_values[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -0,0 +1,94 @@
+import importlib
+import threading
+
+# retailer class name -> 'module:Class'. Modules starting with a dot are in this package, a retailer module is
+# only imported when its class is first requested
+_entry_points = {
+    'ADI': '.adi:ADI',
+    'AstonAndFincher': '.aston_and_fincher:AstonAndFincher',
+    'ASOS': '.asos:ASOS',
+    'AmazonUS': '.amazon:AmazonUS',
+    'AmazonGB': '.amazon:AmazonGB',
+    'AmazonDE': '.amazon:AmazonDE',
+    'AmazonFR': '.amazon:AmazonFR',
+    'AmazonES': '.amazon:AmazonES',
+    'AmazonCA': '.amazon:AmazonCA',
+    'Baldacci': '.baldacci:Baldacci',
+    'BSG': '.bsg:BSG',
+    'CultBeautyOLD': '.cult_beauty_old:CultBeautyOLD',
+    'HaircareAustralia': '.haircare_australia:HaircareAustralia',
+    'JCPenney': '.jc_penney:JCPenney',
+    'NewFlag': '.new_flag:NewFlag',
+    'SallyBeautyMexico': '.sally_beauty_mexico:SallyBeautyMexico',
+    'SallyUKProDuo': '.sallyuk_produo:SallyUKProDuo',
+    'SalonCentric': '.salon_centric:SalonCentric',
+    'THG': '.thg:THG',
+    'CultBeauty': '.cult_beauty:CultBeauty',
+    'Sephora': '.sephora:Sephora',
+}
+_classes = {}
+_lock = threading.RLock()
+
+
+def register_retailer(name, target):
+    """
+    Registers a retailer, replacing any retailer registered with the same name
+    :param name: 'ADI'
+    :param target: 'retailers.adi:ADI' entry point loaded on first use, or the retailer class itself
+    """
+    with _lock:
+        _classes.pop(name, None)
+        if isinstance(target, str):
+            if ':' not in target:
+                raise ValueError(f"Invalid entry point {target} for retailer {name}, expected 'module:Class'")
+            _entry_points[name] = target
+        else:
+            _entry_points.pop(name, None)
+            _classes[name] = target
+
+
+def retailer_names():
+    """
+    :return: ['ADI', 'AstonAndFincher', ...] every registered retailer
+    """
+    with _lock:
+        return list(dict.fromkeys(list(_entry_points) + list(_classes)))
+
+
+def get_retailer_class(name):
+    """
+    :param name: 'ADI'
+    :return: the retailer class, its module is imported on the first call
+    """
+    with _lock:
+        if name not in _classes:
+            if name not in _entry_points:
+                raise ValueError(f"Unknown retailer {name}, registered retailers are - {', '.join(retailer_names())}")
+            module_name, _, class_name = _entry_points[name].partition(':')
+            module = importlib.import_module(module_name, package=__package__)
+            _classes[name] = getattr(module, class_name)
+        return _classes[name]
+
+
+def create_retailer(name):
+    """
+    :param name: 'ADI'
+    :return: ADI()
+    """
+    return get_retailer_class(name)()
+
+
+def create_retailers(names):
+    """
+    Creates several retailers for a batch run. A retailer which can't be created doesn't stop the others
+    :param names: ['ADI', 'BSG']
+    :return: tuple of dictionaries ({'ADI': ADI()}, {'BSG': exception})
+    """
+    created = {}
+    failed = {}
+    for name in names:
+        try:
+            created[name] = create_retailer(name)
+        except Exception as e:
+            failed[name] = e
+    return created, failed
@@ -1,8 +1,8 @@
-import logging
-import calendar
 import pandas as pd
 from datetime import date
 from retail.main.retailer import Retailer
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import month_start, month_end
 from airflow.models import Variable
 
 
@@ -23,37 +23,6 @@ def get_filtered_df(df, date_column, num_months=1):
     return df
 
 
-def get_start_date(input_date):
-    """
-    This method returns the start date of the report
-    :param input_date:
-    :return start_date: '2021-03-01'
-    """
-    try:
-        year = input_date.year
-        month = input_date.month
-        start_date = date(year, month, 1).strftime("%Y-%m-%d")
-        return start_date
-    except Exception as e:
-        logging.error(e)
-
-
-def get_end_date(input_date):
-    """
-    This method returns the end date of the report
-    :param input_date: '2021-03-01'
-    :return start_date: '2021-03-31'
-    """
-    try:
-        year = input_date.year
-        month = input_date.month
-        num_days = int(calendar.monthrange(year, month)[1])
-        end_date = date(year, month, num_days).strftime("%Y-%m-%d")
-        return end_date
-    except Exception as e:
-        logging.error(e)
-
-
 def get_num_months():
     """
     This method retrieves value from Airflow Variables. Decides how many months we should retrieve data from the
@@ -186,23 +155,25 @@ class SallyBeautyMexico(Retailer):
         :param hardcoded_dict: sales_of_stores_hardcoded
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet)
-            df = pd.DataFrame(columns=df_original.columns)
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict,
+                                 table_columns=self.get_table_columns(report_type))
+            workbook = self.get_workbook(report_dict['local_path'])
+            df = pd.DataFrame()
 
             if report_type == 'sales':
-                df = get_filtered_df(df=df_original, date_column='Month', num_months=get_num_months())
-                df.rename(columns=mapping_dict, inplace=True)
-                df["reporting_period_start"] = df.apply(lambda x: get_start_date(x.Month), axis=1)
-                df["reporting_period_end"] = df.apply(lambda x: get_end_date(x.Month), axis=1)
+                df = spec.read_excel(workbook, sheet, extra_columns=['Month'])
+                df = get_filtered_df(df=df, date_column='Month', num_months=get_num_months())
+                month = pd.to_datetime(df.Month)
+                df["reporting_period_start"] = month_start(month.dt.year, month.dt.month)
+                df["reporting_period_end"] = month_end(month.dt.year, month.dt.month)
 
             elif report_type == 'inventory':
-                df = get_filtered_df(df=df_original, date_column='effective_date', num_months=get_num_months())
+                df = spec.read_excel(workbook, sheet)
+                df = get_filtered_df(df=df, date_column='effective_date', num_months=get_num_months())
                 df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,8 +1,8 @@
 import os
-import pandas as pd
 from datetime import datetime
 from retail.main.retailer import Retailer
-from retail.main.utils import generate_record_id, generate_report_id, generate_uuid
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import generate_row_ids
 from retail.main.config import app_config
 
 
@@ -131,32 +131,17 @@ class SallyUKProDuo(Retailer):
         :param report_type: 'sales'
         :param sheet: 'Sales'
         """
-        file_name = os.path.basename(report_dict['local_path'])
-
-        uuid_list = []
-        report_id_list = []
+        self._record_output(df, report_type, sheet)
 
-        for index in range(len(df)):
-            md5_text = ''.join([val for val in df.iloc[index].astype(str).values])
-            uuid_list.append(generate_uuid(md5_text))
-
-            report_id_list.append(
-                generate_report_id(
-                    file_name=file_name,  # filename without Timestamp
-                    reporting_period=df.reporting_period.iloc[index],
-                    end_date=df.reporting_period_end.iloc[index] if report_type == 'sales' else df.effective_date.iloc[
-                        index],
-                    retailer_id=df.retailer_id.iloc[index],
-                    num_records=len(df),
-                    sheet_name=sheet
-                )
-            )
+        file_name = os.path.basename(report_dict['local_path'])
 
+        uuid_list, report_id_list, record_id_list = generate_row_ids(df=df,
+                                                                     file_name=file_name,
+                                                                     report_type=report_type,
+                                                                     sheet_name=sheet)
         df["uuid"] = uuid_list
         df['report_id'] = report_id_list
-
-        df['record_id'] = [generate_record_id(report_id=report_id, row_number=index)
-                           for index, report_id in enumerate(df.report_id)]
+        df['record_id'] = record_id_list
 
         df["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         df["file_name"] = file_name
@@ -240,29 +225,21 @@ class SallyUKProDuo(Retailer):
         :param hardcoded_dict:
         """
         try:
-            df_original = pd.read_excel(report_dict['local_path'], sheet, dtype=dtypes)
-            df = pd.DataFrame()
-            for col in df_original.columns:
-                for k in mapping_dict.keys():
-                    if col.lower() == k.lower():
-                        df[k] = df_original[col]
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict, dtypes=dtypes)
+            df = spec.read_excel(self.get_workbook(report_dict['local_path']), sheet)
 
             df['retailer_id'] = df['retailer_name'].apply(retailer_name_to_id)
             df['retailer_internal_id'] = df['retailer_name'].apply(retailer_name_to_internal_id)
 
             if report_type == 'sales':
-                df.rename(columns=mapping_dict, inplace=True)
                 df["reporting_period_start"] = df["reporting_period_start"].dt.strftime("%Y-%m-%d")
                 df["reporting_period_end"] = df["reporting_period_end"].dt.strftime("%Y-%m-%d")
 
             else:
-                df.rename(columns=mapping_dict, inplace=True)
                 df["effective_date"] = df["effective_date"].dt.strftime("%Y-%m-%d")
 
             # hardcoded fields
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,35 +1,7 @@
-import calendar
 import logging
-import pandas as pd
-from datetime import date
 from retail.main.retailer import Retailer
-from retail.main.utils import str_to_num
-
-
-def get_end_date(fiscal_month):
-    """
-    This function returns end date in %Y-%m-%d format
-    This is used for client Salon Centric
-    :param fiscal_month: '2020-M02 (Feb)'
-    :return end_date: '2020-02-29'
-    """
-    fiscal_month = fiscal_month.split('(')[0].strip().replace('M', '')
-    year, month = (int(x) for x in fiscal_month.split('-'))
-    num_days = int(calendar.monthrange(year, month)[1])
-    end_date = date(year, month, num_days).strftime("%Y-%m-%d")
-    return end_date
-
-
-def get_start_date(fiscal_month):
-    """
-    This function returns a tuple of dates in %Y-%m-%d format
-    This is used for client Salon Centric
-    :param fiscal_month : '2021-M04 (Feb)'
-    :return start_date, end_date (tuple) : ('2020-02-01', '2020-02-29')
-    """
-    fiscal_month = fiscal_month.split('(')[0].strip().replace('M', '')
-    start_date = f"{fiscal_month}-01"
-    return start_date
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import to_number, parse_fiscal_month, month_start, month_end
 
 
 class SalonCentric(Retailer):
@@ -221,23 +193,24 @@ class SalonCentric(Retailer):
         :param hardcoded_dict: sku_by_channel_hardcoded
         """
         try:
-            df = pd.read_excel(report_dict['local_path'], sheet_name=sheet, dtype=dtypes)
+            spec = ColumnMapping(mapping_dict, hardcoded=hardcoded_dict, dtypes=dtypes,
+                                 table_columns=self.get_table_columns(report_type))
+            workbook = self.get_workbook(report_dict['local_path'])
 
             if report_type == 'sales':
-                df['reporting_period_start'] = df['Fiscal Month'].apply(get_start_date)
-                df['reporting_period_end'] = df['Fiscal Month'].apply(get_end_date)
-                df.rename(columns=mapping_dict, inplace=True)
+                df = spec.read_excel(workbook, sheet, extra_columns=['Fiscal Month'])
+                year, month = parse_fiscal_month(df['Fiscal Month'])
+                df['reporting_period_start'] = month_start(year, month)
+                df['reporting_period_end'] = month_end(year, month)
 
-                df["total_quantity"] = df["total_quantity"].apply(str_to_num)
-                df["total_value"] = df["total_value"].apply(str_to_num)
+                df["total_quantity"] = to_number(df["total_quantity"])
+                df["total_value"] = to_number(df["total_value"])
             else:
-                df['effective_date'] = df['MONTH'].apply(get_end_date)
-                df.rename(columns=mapping_dict, inplace=True)
-                df["quantity_warehouse"] = df["quantity_warehouse"].apply(str_to_num)
+                df = spec.read_excel(workbook, sheet, extra_columns=['MONTH'])
+                df['effective_date'] = month_end(*parse_fiscal_month(df['MONTH']))
+                df["quantity_warehouse"] = to_number(df["quantity_warehouse"])
 
-            if hardcoded_dict:
-                for key in hardcoded_dict:
-                    df[key] = hardcoded_dict[key]
+            df = spec.add_hardcoded(df)
 
             self.append_metadata(
                 df=df,
@@ -1,13 +1,12 @@
 import os
 import logging
 import datetime
-import pandas as pd
 from aws import Redshift
 from datetime import datetime
 from datetime import timedelta
 from retail.main.config import app_config
 from retail.main.retailer import Retailer
-from retail.main.utils import generate_uuid, generate_report_id, generate_record_id
+from retail.main.utils import generate_row_ids
 
 
 def get_ca_stores():
@@ -16,9 +15,9 @@ def get_ca_stores():
     Data are retrieved from sephora_ca_stores_table in the schema
     :return ca_stores_list: []
     """
-    rdsft = Redshift(**app_config.redshift_creds)
     ca_stores_sql = f"SELECT * FROM {app_config.redshift_sephora_ca_stores_table};"
-    ca_stores_df = rdsft.read_sql(ca_stores_sql)
+    with Redshift(**app_config.redshift_creds) as rdsft:
+        ca_stores_df = rdsft.read_sql(ca_stores_sql)
     ca_stores_list = [x.lower() for x in ca_stores_df['store_id']]
     return ca_stores_list
 
@@ -65,15 +64,15 @@ def get_retailer_internal_id(country):
         return None
 
 
-def get_effective_date(file_name, sheet_name):
+def get_effective_date(workbook, sheet_name):
     """
     This method is specific to Sephora. Called for Sheet Inventory in file name Best Seller - Olaplex - Skincare.xlsx
-    :param file_name: 'Best Seller - Olaplex - Skincare.xlsx'
+    :param workbook: Workbook('Best Seller - Olaplex - Skincare.xlsx')
     :param sheet_name: 'Inventory'
     :return : '2021-04=03'
     """
     cell_index = (3, 'A')
-    week_end_str = get_excel_cell(file_name, sheet_name, row=cell_index[0], col=cell_index[1])
+    week_end_str = get_excel_cell(workbook, sheet_name, row=cell_index[0], col=cell_index[1])
 
     # format: Week end date: Jun 15, 2019
     week_end_str = week_end_str.split(":")[1].strip()
@@ -82,30 +81,27 @@ def get_effective_date(file_name, sheet_name):
     return end_date.strftime("%Y-%m-%d")
 
 
-def get_excel_cell(file_path, sheet_name, row=1, col='A'):
+def get_excel_cell(workbook, sheet_name, row=1, col='A'):
     """
     This method is specific to Sephora. This method returns the value in a specific cell in the excel sheet.
-    :param file_path: 'Best Seller - Olaplex - Skincare.xlsx'
+    :param workbook: Workbook('Best Seller - Olaplex - Skincare.xlsx')
     :param sheet_name: 'Inventory'
     :param row: '3'
     :param col: 'A'
     :return : 'Week end date: Jan 30, 2021'
     """
-    if row < 1:
-        row = 1
-    df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=col, header=None)
-    return df.iloc[row - 1].values[0]
+    return workbook.get_cell(sheet_name, row=row, col=col)
 
 
-def get_weekly_range(file_name, sheet_name):
+def get_weekly_range(workbook, sheet_name):
     """
     This method is specific to Sephora. Returns weekly range for file 'Best Seller - Olaplex - Skincare.xlsx'
-    :param file_name: 'Best Seller - Olaplex - Skincare.xlsx'
+    :param workbook: Workbook('Best Seller - Olaplex - Skincare.xlsx')
     :param sheet_name: 'US'
     :return : '2021-04=03', '2021=04=10'
     """
     cell_index = (3, 'A')
-    week_end_str = get_excel_cell(file_name, sheet_name, row=cell_index[0], col=cell_index[1])
+    week_end_str = get_excel_cell(workbook, sheet_name, row=cell_index[0], col=cell_index[1])
 
     # format: Week end date: Jun 15, 2019
     week_end_str = week_end_str.split(":")[1].strip()
@@ -116,15 +112,15 @@ def get_weekly_range(file_name, sheet_name):
     return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
 
 
-def get_weekly_range2(file_name, sheet_name):
+def get_weekly_range2(workbook, sheet_name):
     """
     This method is specific to Sephora. Returns weekly range for file 'Olaplex Weekly Brand Sales by Store and SKU.xlsx'
-    :param file_name: 'Olaplex Weekly Brand Sales by Store and SKU.xlsx'
+    :param workbook: Workbook('Olaplex Weekly Brand Sales by Store and SKU.xlsx')
     :param sheet_name: 'WEEKLY brand sales by store'
     :return : '2021-04=03', '2021=04=10'
     """
     cell_index = (2, 'B')
-    week_end_str = get_excel_cell(file_name, sheet_name, row=cell_index[0], col=cell_index[1])
+    week_end_str = get_excel_cell(workbook, sheet_name, row=cell_index[0], col=cell_index[1])
     # Format: Jun-27-2020
     end_date = datetime.strptime(str(week_end_str), '%b-%d-%Y')
     start_date = end_date - timedelta(days=6)
@@ -167,6 +163,8 @@ class Sephora(Retailer):
         :param report_type: 'Sales'
         :param sheet: 'US_1'
         """
+        self._record_output(df, report_type, sheet)
+
         file_name = os.path.basename(report_dict['local_path'])
 
         df['retailer_id'] = df['country'].apply(get_retailer_id)
@@ -174,30 +172,13 @@ class Sephora(Retailer):
         df['retailer_internal_id'] = df['country'].apply(get_retailer_internal_id)
         df['reporting_period'] = 'Weekly'
 
-        uuid_list = []
-        report_id_list = []
-
-        for index in range(len(df)):
-            md5_text = ''.join([val for val in df.iloc[index].astype(str).values])
-            uuid_list.append(generate_uuid(md5_text))
-
-            report_id_list.append(
-                generate_report_id(
-                    file_name=file_name,  # filename without Timestamp
-                    reporting_period=df.reporting_period.iloc[index],
-                    end_date=df.reporting_period_end.iloc[index] if report_type == 'sales' else df.effective_date.iloc[
-                        index],
-                    retailer_id=df.retailer_id.iloc[index],
-                    num_records=len(df),
-                    sheet_name=sheet
-                )
-            )
-
+        uuid_list, report_id_list, record_id_list = generate_row_ids(df=df,
+                                                                     file_name=file_name,
+                                                                     report_type=report_type,
+                                                                     sheet_name=sheet)
         df["uuid"] = uuid_list
         df['report_id'] = report_id_list
-
-        df['record_id'] = [generate_record_id(report_id=report_id, row_number=index)
-                           for index, report_id in enumerate(df.report_id)]
+        df['record_id'] = record_id_list
 
         df["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         df["file_name"] = file_name
@@ -208,6 +189,7 @@ class Sephora(Retailer):
         df["email_subject"] = report_dict["Subject"]
         # Updating the temp dictionary with metadata
         report_dict["output_df"] = df
+        report_dict["report_type"] = report_type
 
         if sheet:
             report_dict["sheet_name"] = sheet
@@ -314,9 +296,9 @@ class Sephora(Retailer):
             else:
                 return
 
-            df = pd.read_excel(
-                io=report_dict['local_path'],
-                sheet_name=sheet,
+            workbook = self.get_workbook(report_dict['local_path'])
+            df = workbook.parse(
+                sheet,
                 header=header_index,
                 usecols=','.join(cols.keys()),
                 index_col=None)
@@ -330,7 +312,7 @@ class Sephora(Retailer):
 
             df['type'] = 'by_country_sku'
             df['effective_date'] = get_effective_date(
-                file_name=report_dict['local_path'],
+                workbook=workbook,
                 sheet_name=sheet
             )
 
@@ -395,16 +377,16 @@ class Sephora(Retailer):
             else:
                 return
 
-            df = pd.read_excel(io=report_dict['local_path'],
-                               sheet_name=sheet,
-                               header=header_index,
-                               usecols=','.join(cols.keys()),
-                               index_col=None)
+            workbook = self.get_workbook(report_dict['local_path'])
+            df = workbook.parse(sheet,
+                                header=header_index,
+                                usecols=','.join(cols.keys()),
+                                index_col=None)
 
             col_mapping = {v[0]: v[1] for k, v in cols.items() if v[1]}
             df = df.rename(columns=col_mapping)
 
-            start_date, end_date = get_weekly_range(file_name=report_dict['local_path'], sheet_name=sheet)
+            start_date, end_date = get_weekly_range(workbook=workbook, sheet_name=sheet)
 
             df['reporting_period_start'] = start_date
             df['reporting_period_end'] = end_date
@@ -453,9 +435,9 @@ class Sephora(Retailer):
             }
             col_mapping = {v[0]: v[1] for k, v in cols.items() if v[1]}
 
-            df = pd.read_excel(
-                io=report_dict['local_path'],
-                sheet_name=sheet,
+            workbook = self.get_workbook(report_dict['local_path'])
+            df = workbook.parse(
+                sheet,
                 header=header_index,
                 usecols=','.join(cols.keys()),
                 index_col=None)
@@ -465,7 +447,7 @@ class Sephora(Retailer):
             # Get rid of the last row
             df = df[:-1]
 
-            start_date, end_date = get_weekly_range2(file_name=report_dict['local_path'], sheet_name=sheet)
+            start_date, end_date = get_weekly_range2(workbook=workbook, sheet_name=sheet)
 
             df['reporting_period_start'] = start_date
             df['reporting_period_end'] = end_date
@@ -516,9 +498,8 @@ class Sephora(Retailer):
 
             col_mapping = {v[0]: v[1] for k, v in cols.items() if v[1]}
 
-            df = pd.read_excel(
-                io=report_dict['local_path'],
-                sheet_name=sheet,
+            df = self.get_workbook(report_dict['local_path']).parse(
+                sheet,
                 skiprows=6,
                 usecols=','.join(cols.keys()),
                 index_col=None)
@@ -1,47 +1,9 @@
 import os
 import logging
 import pandas as pd
-from datetime import datetime, timedelta
 from retail.main.retailer import Retailer
-
-
-def get_iso_first_date(iso_year, iso_week):
-    """
-    Returns ISO date range from year and week number
-    :param iso_year: '2021'
-    :param iso_week: '14'
-    :return last_day: '2021-03-27'
-    """
-    try:
-        iso_year = int(float(iso_year))
-        iso_week = int(float(iso_week))
-        # first_day = datetime.strptime(f'{iso_year}-W{int(iso_week )- 1}-1', "%Y-W%W-%w").date()
-        first_day = datetime.strptime(f'{iso_year}-W{iso_week}-1', "%G-W%V-%u").date()
-        first_day = first_day.strftime('%Y-%m-%d')
-        return first_day
-    except Exception as e:
-        logging.error(e)
-        raise
-
-
-def get_iso_last_date(iso_year, iso_week):
-    """
-    Returns ISO date range from year and week number
-    :param iso_year: '2021'
-    :param iso_week: '14'
-    :return last_day: '2021-04-02'
-    """
-    try:
-        iso_year = int(float(iso_year))
-        iso_week = int(float(iso_week))
-        # first_day = datetime.strptime(f'{iso_year}-W{int(iso_week )- 1}-1', "%Y-W%W-%w").date()
-        first_day = datetime.strptime(f'{iso_year}-W{iso_week}-1', "%G-W%V-%u").date()
-        last_day = first_day + timedelta(days=6.9)
-        last_day = last_day.strftime('%Y-%m-%d')
-        return last_day
-    except Exception as e:
-        logging.error(e)
-        raise
+from retail.main.column_mapping import ColumnMapping
+from retail.main.utils import iso_week_start, iso_week_end
 
 
 def get_effective_date_thg(file_name):
@@ -63,14 +25,14 @@ def get_effective_date_thg(file_name):
         raise
 
 
-def get_inventory_dataframe(file_name):
+def get_inventory_dataframe(workbook):
     """
     Return a combined dataframe for stock view file used in inventory
-    :param file_name: 'THG Weekly UK Report 2021-04-12.xlsx'
+    :param workbook: Workbook('THG Weekly UK Report 2021-04-12.xlsx')
     :return result: DataFrame
     """
-    df_omega = pd.read_excel(io=file_name, usecols=[1, 2, 5, 6], skiprows=1)
-    df_poland = pd.read_excel(io=file_name, usecols=[1, 2, 13, 14], skiprows=1)
+    df_omega = workbook.parse(usecols=[1, 2, 5, 6], skiprows=1)
+    df_poland = workbook.parse(usecols=[1, 2, 13, 14], skiprows=1)
     df_omega['plant_name'] = "Omega"
     df_poland['plant_name'] = "Poland"
     poland_cols = {
@@ -177,15 +139,16 @@ class THG(Retailer):
         :param hardcoded_dict: sales_hardcoded
         """
         try:
+            workbook = self.get_workbook(report_dict['local_path'])
             if report_type == 'sales':
-                df = pd.read_excel(report_dict['local_path'], sheet)
-                if 'Year' not in df.columns:
-                    df = pd.read_excel(report_dict['local_path'],sheet, skiprows=1)
-                df.rename(columns=mapping_dict, inplace=True)
-                df["reporting_period_start"] = df.apply(lambda x: get_iso_first_date(x.Year, x.iso_week), axis=1)
-                df["reporting_period_end"] = df.apply(lambda x: get_iso_last_date(x.Year, x.iso_week), axis=1)
+                spec = ColumnMapping(mapping_dict, table_columns=self.get_table_columns(report_type))
+                # some weeks the header comes after a title row
+                skiprows = None if 'Year' in workbook.get_columns(sheet) else 1
+                df = spec.read_excel(workbook, sheet, skiprows=skiprows, extra_columns=['Year', 'iso_week'])
+                df["reporting_period_start"] = iso_week_start(df.Year, df.iso_week)
+                df["reporting_period_end"] = iso_week_end(df.Year, df.iso_week)
             elif report_type == 'inventory':
-                df = get_inventory_dataframe(report_dict['local_path'])
+                df = get_inventory_dataframe(workbook)
                 df["effective_date"] = get_effective_date_thg(report_dict['local_path'])
 
             # hardcoded fields
@@ -1,4 +1,6 @@
 from .create_sales_table import sales_table_ddl
 from .load_sales_data import load_retail_sales_sql
 from .create_inventory_table import inventory_table_ddl
-from .load_inventory_data import load_retail_inventory_sql
\ No newline at end of file
+from .load_inventory_data import load_retail_inventory_sql
+from .schema import sales_table_schema, inventory_table_schema, build_table_ddl
+from .load_final_data import load_final_table_sql
@@ -0,0 +1,26 @@
+# Loads the new rows of a staging table to its final table.
+# Staging is deduplicated once, the latest row (by created_at) of each (record_id, report_id, uuid) is kept.
+# Rows already in the final table are skipped with an anti-join on record_id. As record_id is derived from
+# report_id only the final rows of the reports being loaded are read.
+load_final_table_sql = '''
+    CREATE TEMP TABLE {STAGING_DEDUP_TABLE} AS
+    SELECT {COLUMNS}
+    FROM (
+        SELECT {COLUMNS},
+            ROW_NUMBER() OVER(partition by record_id, report_id, uuid order by created_at desc) AS row_num
+        FROM {REDSHIFT_STG_TABLE}
+    ) staging
+    WHERE row_num = 1;
+
+    INSERT INTO {REDSHIFT_FINAL_TABLE} ({COLUMNS})
+    SELECT {STAGING_COLUMNS}
+    FROM {STAGING_DEDUP_TABLE} s
+    LEFT JOIN (
+        SELECT DISTINCT record_id
+        FROM {REDSHIFT_FINAL_TABLE}
+        WHERE report_id IN (SELECT DISTINCT report_id FROM {STAGING_DEDUP_TABLE})
+    ) f ON s.record_id = f.record_id
+    WHERE f.record_id IS NULL;
+
+    DROP TABLE {STAGING_DEDUP_TABLE};
+'''
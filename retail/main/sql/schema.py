@@ -0,0 +1,95 @@
+import re
+from collections import namedtuple
+from .create_sales_table import sales_table_ddl
+from .create_inventory_table import inventory_table_ddl
+
+# data_type is lower-cased ('varchar', 'decimal', 'timestamp', 'int'), length holds the varchar length or the
+# decimal precision and scale the decimal scale
+Column = namedtuple('Column', ['name', 'data_type', 'length', 'scale'])
+
+_column_pattern = re.compile(r'^\s*"?(\w+)"?\s+(\w+)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*,?\s*$')
+
+
+def parse_table_ddl(ddl):
+    """
+    Reads the column definitions of a CREATE TABLE statement, in table order.
+    Column names are lower-cased like the headers of the uploaded files.
+    :param ddl: sales_table_ddl
+    :return: [Column(name='record_id', data_type='varchar', length=255, scale=None), ...]
+    """
+    body = ddl[ddl.index('(') + 1:ddl.rindex(')')]
+    columns = []
+    for line in body.splitlines():
+        match = _column_pattern.match(line)
+        if match:
+            name, data_type, length, scale = match.groups()
+            columns.append(Column(name=name.lower(),
+                                  data_type=data_type.lower(),
+                                  length=int(length) if length else None,
+                                  scale=int(scale) if scale else None))
+    return columns
+
+
+def get_column_type(column):
+    """
+    :param column: Column(name='total_quantity', data_type='decimal', length=20, scale=2)
+    :return: 'decimal(20,2)'
+    """
+    if column.length and column.scale is not None:
+        return f"{column.data_type}({column.length},{column.scale})"
+    elif column.length:
+        return f"{column.data_type}({column.length})"
+    return column.data_type
+
+
+def get_column_encoding(column, sort_keys=()):
+    """
+    Compression encoding of a column. The leading sort key is left RAW so range restricted scans stay effective,
+    numbers and timestamps use AZ64 and strings ZSTD.
+    """
+    if sort_keys and column.name == sort_keys[0]:
+        return 'raw'
+    elif column.data_type in ('decimal', 'numeric', 'int', 'integer', 'smallint', 'bigint', 'timestamp', 'date'):
+        return 'az64'
+    return 'zstd'
+
+
+def build_table_ddl(table_name, schema, dist_key=None, sort_keys=None, encode=False):
+    """
+    Generates the CREATE TABLE statement of a table schema with optional distribution, sort keys and encodings
+    :param table_name: 'dev_retail_data.retail_sales'
+    :param schema: sales_table_schema
+    :param dist_key: 'record_id'
+    :param sort_keys: ['retailer_id', 'reporting_period_end']
+    :param encode: True
+    :return: sql command
+    """
+    sort_keys = sort_keys or []
+    column_names = [column.name for column in schema]
+    for key in ([dist_key] if dist_key else []) + sort_keys:
+        if key not in column_names:
+            raise ValueError(f"Key column {key} is not a column of {table_name}")
+
+    columns = []
+    for column in schema:
+        definition = f'"{column.name}" {get_column_type(column)}'
+        if encode:
+            definition += f" ENCODE {get_column_encoding(column, sort_keys)}"
+        columns.append(definition)
+
+    table_options = ''
+    if dist_key:
+        table_options += f"\n            DISTKEY({dist_key})"
+    if sort_keys:
+        table_options += f"\n            SORTKEY({', '.join(sort_keys)})"
+
+    column_lines = ',\n                '.join(columns)
+    return f"""
+            CREATE TABLE IF NOT EXISTS {table_name}(
+                {column_lines}
+            ){table_options};
+"""
+
+
+sales_table_schema = parse_table_ddl(sales_table_ddl)
+inventory_table_schema = parse_table_ddl(inventory_table_ddl)
@@ -1,7 +1,8 @@
 import hashlib
-import pandas as pd
+import logging
+import dateutil.parser
 from datetime import datetime
-import dateutil
+from retailer_registry import get_retailer_registry
 
 
 def str_to_num(string_val, characters_to_remove=(' ', ',', '$')):
@@ -17,6 +18,65 @@ def str_to_num(string_val, characters_to_remove=(' ', ',', '$')):
     return float(string_val)
 
 
+class NumberParseError(ValueError):
+
+    def __init__(self, name, invalid, max_shown=10):
+        """
+        Raised by to_number with every cell of a column which is not a number
+        :param name: 'total_value'
+        :param invalid: Series of the invalid cells, indexed by row
+        """
+        self.invalid = invalid
+        shown = ', '.join(f"row {row}: {value!r}" for row, value in invalid.head(max_shown).items())
+        more = f" and {len(invalid) - max_shown} more" if len(invalid) > max_shown else ''
+        super().__init__(f"{len(invalid)} values of {name} are not numbers - {shown}{more}")
+
+
+_currency_pattern = r'[\s$€£¥]'
+
+
+def to_number(series, decimal='.', errors='raise'):
+    """
+    Vectorized replacement of str_to_num for a whole column. Numeric cells are kept as they are, text cells are
+    cleaned of spaces, currency symbols and thousand separators. Accounting negatives '(12.50)' are supported.
+    decimal=',' is for European numbers, text with a comma gets '.' as thousand separator and ',' as decimal
+    separator, text without a comma is read as is.
+    :param series: Series ['$1,234.50', 12, '(3.00)']
+    :param decimal: '.' or ','
+    :param errors: 'raise' raises a NumberParseError listing all the invalid cells, 'coerce' sets them to NaN
+    :return: float Series [1234.5, 12.0, -3.0]
+    """
+    import numpy as np
+    import pandas as pd
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+
+    # positional masks, the index of a parsed sheet isn't always unique
+    is_text = series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    text = pd.Series(series.to_numpy()[is_text], dtype=object).str.replace(_currency_pattern, '', regex=True)
+    if decimal == ',':
+        european = text.str.contains(',', regex=False)
+        text[european] = text[european].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    else:
+        text = text.str.replace(',', '', regex=False)
+    negative = text.str.match(r'^\(.*\)$')
+    text[negative] = '-' + text[negative].str.slice(1, -1)
+
+    # blank text cells are missing values like the empty cells
+    blank = np.zeros(len(series), dtype=bool)
+    blank[is_text] = (text == '').to_numpy(dtype=bool)
+
+    result = pd.to_numeric(series.mask(is_text), errors='coerce').to_numpy(dtype=float)
+    result[is_text] = pd.to_numeric(text.mask(text == ''), errors='coerce').to_numpy(dtype=float)
+    invalid = series[np.isnan(result) & series.notna().to_numpy() & ~blank]
+    if len(invalid):
+        error = NumberParseError(series.name, invalid)
+        if errors == 'raise':
+            raise error
+        logging.warning(error)
+    return pd.Series(result, index=series.index, name=series.name)
+
+
 def generate_record_id(report_id, row_number):
     """
     Generate unique record_id for each row received in a email using (report_id + row_number)
@@ -58,34 +118,104 @@ def generate_uuid(data_row):
     return uuid
 
 
-def get_retailer_info(class_name, retailer_info_file='retailer_info.csv'):
+def _stringify(values):
+    """
+    Converts a column to the strings str() returns for each cell. Cells are taken as python objects
+    (Timestamp, int, float, None) exactly like df.iloc[index] gives them, so the result is identical to
+    converting the row values one by one
+    :param values: Series
+    :return: Series of str
+    """
+    import pandas as pd
+    return pd.Series(values).astype(object).map(str)
+
+
+def generate_uuids(df):
+    """
+    Batch version of generate_uuid. Generates the uuid of every row in the DataFrame in one pass.
+    The md5 text of a row is the concatenation of the str() of all its values in column order
+    :param df: DataFrame
+    :return: list of uuid : ['0259de37d44cf86bdb9d26e7619a3d2b', ...]
+    """
+    if df.empty:
+        return []
+    columns = [_stringify(df.iloc[:, i]).to_numpy() for i in range(df.shape[1])]
+    md5_texts = columns[0]
+    for column in columns[1:]:
+        md5_texts = md5_texts + column
+    return [hashlib.md5(text.encode()).hexdigest() for text in md5_texts]
+
+
+def generate_report_ids(file_name, reporting_period, end_date, retailer_id, num_records, sheet_name=None):
+    """
+    Batch version of generate_report_id. reporting_period, end_date and retailer_id are Series of the same length.
+    The report_id only changes with those values so it is hashed once per distinct combination
+    :param file_name: '1616086825_ADI Inventory Report 2021-01-31.xlsx'
+    :param reporting_period: Series ['Monthly', ...]
+    :param end_date: Series ['2021-01-31', ...]
+    :param retailer_id: Series ['C033038 ADI srl', ...]
+    :param num_records: '1233'
+    :param sheet_name: 'Sales'
+    :return: list of report_id : ['0259de37d44cf86bdb9d26e7619a3d2b', ...]
+    """
+    file_name = file_name.split('_', maxsplit=1)[1]  # Trimming the Timestamp from filename
+    hashing = (f"{file_name}|{sheet_name}|" + _stringify(reporting_period).to_numpy() + "|" +
+               _stringify(end_date).to_numpy() + "|" + _stringify(retailer_id).to_numpy() + f"|{num_records}")
+    report_ids = {text: hashlib.md5(text.encode()).hexdigest() for text in set(hashing)}
+    return [report_ids[text] for text in hashing]
+
+
+def generate_record_ids(report_ids):
+    """
+    Batch version of generate_record_id. Uses the position of each report_id as the row_number
+    :param report_ids: ['rg59de3add4cf86bdb267gaddga3d2as', ...]
+    :return: list of record_id : ['0259de37d44cf86bdb9d26e7619a3d2b', ...]
+    """
+    return [hashlib.md5(f"{report_id}|{row_number}".encode()).hexdigest()
+            for row_number, report_id in enumerate(report_ids)]
+
+
+def generate_row_ids(df, file_name, report_type, sheet_name=None):
+    """
+    Generates uuid, report_id and record_id of every row of a parsed sheet in one pass.
+    Output is identical to calling generate_uuid, generate_report_id and generate_record_id row by row.
+    The end date is reporting_period_end for sales and effective_date for inventory
+    :param df: DataFrame with reporting_period, retailer_id and reporting_period_end/effective_date columns
+    :param file_name: '1616086825_ADI Inventory Report 2021-01-31.xlsx'
+    :param report_type: 'sales'
+    :param sheet_name: 'Sales'
+    :return: tuple (uuid_list, report_id_list, record_id_list)
+    """
+    if df.empty:
+        return [], [], []
+    uuid_list = generate_uuids(df)
+    report_id_list = generate_report_ids(
+        file_name=file_name,
+        reporting_period=df.reporting_period,
+        end_date=df.reporting_period_end if report_type == 'sales' else df.effective_date,
+        retailer_id=df.retailer_id,
+        num_records=len(df),
+        sheet_name=sheet_name
+    )
+    record_id_list = generate_record_ids(report_id_list)
+    return uuid_list, report_id_list, record_id_list
+
+
+def get_retailer_info(class_name):
     """
     This method loads retailer details when requested.
     Following data are called, retailer_id, retailer_internal_id, email_label, file_extensions.
+    The details are read once per process by the retailer registry
     :param class_name: 'ADI'
-    :param retailer_info_file: 'retailer_info.csv'
     :return: retailer_info : {
                                 retailer_id : 'C033038 ADI srl'
                                 retailer_internal_id : '128883'
                                 email_label : 'Retail_Reports-ADI'
-                                extensions : 'xlsx'
+                                file_extensions : ('xlsx',)
                             }
     """
-    df = pd.read_csv(retailer_info_file)
-    retailer_info = {}
-    if class_name in list(df.retailer_class_name):
-        record = df[df.retailer_class_name == class_name].to_dict('records')
-        if len(record) > 1:
-            retailer_info['retailer_internal_id'] = ''
-            retailer_info['retailer_id'] = ''
-        else:
-            retailer_info['retailer_internal_id'] = str(record[0]['retailer_internal_id'])
-            retailer_info['retailer_id'] = record[0]['retailer_id']
-
-        retailer_info["email_label"] = record[0]['email_label']
-        retailer_info["file_extensions"] = record[0]['file_extensions'].split(';')
-
-    return retailer_info
+    retailer_info = get_retailer_registry().get(class_name)
+    return dict(retailer_info) if retailer_info else {}
 
 
 def get_standard_date(input_date):
@@ -101,3 +231,123 @@ def get_standard_date(input_date):
             return dateutil.parser.parse(input_date).strftime('%Y-%m-%d')
     except:
         return datetime.fromordinal(datetime(1900, 1, 1).toordinal() + int(input_date) - 2).strftime('%Y-%m-%d')
+
+
+def map_unique(func, *columns):
+    """
+    Calls func once per distinct value of the columns instead of once per row, date columns of a report usually
+    hold a handful of distinct values
+    :param func: get_country
+    :param columns: df['Year'], df['Month']
+    :return: Series with the index of the first column
+    """
+    import pandas as pd
+    cache = {}
+    values = []
+    for key in zip(*columns):
+        if key not in cache:
+            cache[key] = func(*key)
+        values.append(cache[key])
+    return pd.Series(values, index=columns[0].index, dtype=object)
+
+
+def _to_int(values):
+    """
+    :param values: Series [2021, '2021', 2021.0]
+    :return: int Series, raises ValueError on values which are not numbers
+    """
+    import pandas as pd
+    return pd.to_numeric(values).astype(int)
+
+
+def _month_starts(year, month):
+    import pandas as pd
+    return pd.to_datetime(pd.DataFrame({'year': _to_int(year), 'month': _to_int(month), 'day': 1}))
+
+
+def month_start(year, month):
+    """
+    :param year: Series [2021]
+    :param month: Series [4]
+    :return: Series ['2021-04-01']
+    """
+    return _month_starts(year, month).dt.strftime('%Y-%m-%d')
+
+
+def month_end(year, month):
+    """
+    :param year: Series [2021]
+    :param month: Series [4]
+    :return: Series ['2021-04-30']
+    """
+    import pandas as pd
+    return (_month_starts(year, month) + pd.offsets.MonthEnd(0)).dt.strftime('%Y-%m-%d')
+
+
+def parse_fiscal_month(fiscal_month):
+    """
+    :param fiscal_month: Series ['2020-M02 (Feb)']
+    :return: tuple of int Series (year, month) ([2020], [2])
+    """
+    parts = fiscal_month.astype(str).str.extract(r'^\s*(\d{4})-M(\d{1,2})')
+    invalid = fiscal_month[parts[0].isna()]
+    if len(invalid):
+        raise ValueError(f"{len(invalid)} values of {fiscal_month.name} are not fiscal months: "
+                         f"{', '.join(repr(value) for value in invalid.unique()[:10])}")
+    return _to_int(parts[0]), _to_int(parts[1])
+
+
+def _iso_week_mondays(year, week):
+    import pandas as pd
+    year = _to_int(year)
+    week = _to_int(week)
+    invalid = week[(week < 1) | (week > 53)]
+    if len(invalid):
+        raise ValueError(f"Invalid ISO weeks: {', '.join(str(value) for value in invalid.unique()[:10])}")
+    # ISO week 1 is the week with the 4th of January
+    fourth_of_january = pd.to_datetime(year * 10000 + 104, format='%Y%m%d')
+    return fourth_of_january - pd.to_timedelta(fourth_of_january.dt.weekday, unit='D') + \
+        pd.to_timedelta((week - 1) * 7, unit='D')
+
+
+def iso_week_start(year, week):
+    """
+    :param year: Series [2021]
+    :param week: Series [14]
+    :return: Series ['2021-04-05'], monday of the ISO week
+    """
+    return _iso_week_mondays(year, week).dt.strftime('%Y-%m-%d')
+
+
+def iso_week_end(year, week):
+    """
+    :param year: Series [2021]
+    :param week: Series [14]
+    :return: Series ['2021-04-11'], sunday of the ISO week
+    """
+    import pandas as pd
+    return (_iso_week_mondays(year, week) + pd.Timedelta(days=6)).dt.strftime('%Y-%m-%d')
+
+
+def excel_serial_to_date(serial):
+    """
+    :param serial: Series [44197]
+    :return: Series ['2021-01-01']
+    """
+    import pandas as pd
+    return pd.to_datetime(_to_int(serial), unit='D', origin='1899-12-30').dt.strftime('%Y-%m-%d')
+
+
+def standard_dates(values):
+    """
+    Column version of get_standard_date. Dates and Excel serial numbers are converted in one go, text is parsed
+    once per distinct value
+    :param values: Series ['2021-02-01', '01/03/2021']
+    :return: Series ['2021-02-01', '2021-01-03']
+    """
+    import pandas as pd
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime('%Y-%m-%d')
+    elif pd.api.types.is_numeric_dtype(values):
+        return excel_serial_to_date(values)
+    return map_unique(get_standard_date, values)
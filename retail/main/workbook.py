@@ -0,0 +1,277 @@
+import io
+import logging
+import itertools
+
+READERS = ('streaming', 'pandas')
+# pandas versions whose openpyxl reader the streaming reader was checked against, it hooks the private
+# get_sheet_data of the reader and other versions are read with pandas
+STREAMING_PANDAS_VERSIONS = ('1.2', '1.3', '1.4', '1.5')
+# rows read at least by a head probe, enough for the metadata cells above the data of every report
+HEAD_ROWS = 10
+
+
+def _column_positions(usecols):
+    """
+    Positions of the columns selected by a positional usecols
+    :param usecols: [0, 2] or 'A:C,E'
+    :return: {0, 1, 2, 4} or None if usecols is not positional (column names, callable) or not set
+    """
+    if isinstance(usecols, str):
+        from openpyxl.utils.cell import column_index_from_string
+        positions = set()
+        for part in usecols.split(','):
+            first, _, last = part.strip().partition(':')
+            start = column_index_from_string(first.strip()) - 1
+            end = column_index_from_string(last.strip()) - 1 if last else start
+            positions.update(range(start, end + 1))
+        return positions
+    if isinstance(usecols, (list, tuple)) and usecols and all(isinstance(col, int) for col in usecols):
+        return set(usecols)
+    return None
+
+
+class _SheetWindow:
+
+    def __init__(self, sheet, skiprows=None, header=0, rows_needed=None, keep_columns=None):
+        """
+        Read-only worksheet handed to pandas in place of the real one. Rows are streamed from the sheet, the
+        cells of the data rows outside keep_columns are replaced by empty cells without being converted, unless
+        they hold the only values of the row, and the iteration stops once rows_needed non empty rows are read.
+        :param sheet: openpyxl ReadOnlyWorksheet
+        :param skiprows: {0, 1, 2} row numbers skipped by pandas
+        :param header: 0 header row, counted after the skipped rows like pandas
+        :param rows_needed: 11 header and data rows to read, the whole sheet if None
+        :param keep_columns: {0, 1} column positions to convert in the data rows, all if None
+        """
+        self.sheet = sheet
+        self.skiprows = skiprows or set()
+        self.header = header
+        self.rows_needed = rows_needed
+        self.keep_columns = keep_columns
+
+    def reset_dimensions(self):
+        # pandas checks for this method to tell a read-only sheet
+        if hasattr(self.sheet, 'reset_dimensions'):
+            self.sheet.reset_dimensions()
+
+    @property
+    def rows(self):
+        from openpyxl.cell.read_only import EMPTY_CELL
+        read_rows = 0
+        non_empty_rows = 0
+        for row_number, row in enumerate(self.sheet.rows):
+            if row_number in self.skiprows:
+                yield row
+                continue
+
+            is_header = self.header is not None and read_rows <= self.header
+            read_rows += 1
+            # emptiness is decided on the whole row, pandas trims the trailing empty rows of the sheet and a note
+            # row with values outside keep_columns only must still be read as a data row
+            non_empty = any(cell.value not in (None, '') for cell in row)
+            if not is_header and self.keep_columns is not None:
+                kept = tuple(cell if position in self.keep_columns else EMPTY_CELL
+                             for position, cell in enumerate(row))
+                if not non_empty or any(cell.value not in (None, '') for cell in kept):
+                    row = kept
+            yield row
+
+            # reading more rows than pandas needs is harmless, the row count only has to never fall short
+            if non_empty:
+                non_empty_rows += 1
+            if self.rows_needed is not None and non_empty_rows >= self.rows_needed:
+                return
+
+
+class Workbook:
+
+    def __init__(self, path, reader='streaming'):
+        """
+        Handle on a single Excel attachment. The file is opened once and shared by every parser of the report.
+        Sheet names are read from the workbook index without parsing any data and every parsed sheet is cached
+        for the rest of the report, so a sheet read by several parsers is parsed only once.
+        :param path: '_data\\Sephora\\1616101111_Best Seller - Olaplex.xlsx'
+        :param reader: 'streaming' reads xlsx sheets row by row, skipping the cells of the unused columns and
+                       the rows after nrows. 'pandas' leaves the reading to pandas' openpyxl engine.
+        """
+        if reader not in READERS:
+            raise ValueError(f"Invalid Excel reader {reader}, valid readers are - {', '.join(READERS)}")
+        self.path = path
+        self.reader = reader
+        self._excel_file = None
+        self._sheets = {}
+        self._heads = {}
+
+    @property
+    def excel_file(self):
+        if self._excel_file is None:
+            import pandas as pd
+            logging.info(f"Opening workbook {self.path}")
+            self._excel_file = pd.ExcelFile(self.path)
+        return self._excel_file
+
+    @property
+    def sheet_names(self):
+        return self.excel_file.sheet_names
+
+    @staticmethod
+    def _cache_key(sheet_name, kwargs):
+        return sheet_name, tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+
+    def parse(self, sheet_name=0, **kwargs):
+        """
+        Wrapper around pandas' ExcelFile.parse() which caches the parsed sheet.
+        A copy is returned as the parsers modify the DataFrame in place.
+        :param sheet_name: 'Inventory'
+        :param kwargs: keyword arguments supported by pandas read_excel (header, usecols, skiprows, dtype etc.)
+        :return: pandas DataFrame
+        """
+        key = self._cache_key(sheet_name, kwargs)
+        if key not in self._sheets:
+            self._sheets[key] = self._read(sheet_name, kwargs)
+        return self._sheets[key].copy()
+
+    def head(self, sheet_name=0, nrows=HEAD_ROWS):
+        """
+        Returns the top rows of a sheet, for the report metadata above the data (report dates, titles). The rows
+        are read without a header, once per sheet, and the reading stops after them.
+        Empty rows are skipped like pandas does and the columns are only as wide as the rows read.
+        :param sheet_name: 'Inventory'
+        :param nrows: 3
+        :return: pandas DataFrame with the columns numbered from 0
+        """
+        rows, df = self._heads.get(sheet_name, (0, None))
+        if rows < nrows:
+            rows = max(nrows, HEAD_ROWS)
+            df = self._read(sheet_name, {'header': None, 'nrows': rows}, head=True)
+            self._heads[sheet_name] = rows, df
+        return df.iloc[:nrows].copy()
+
+    def _read(self, sheet_name, kwargs, head=False):
+        if self.reader == 'streaming' and self._streaming_supported():
+            try:
+                return self._read_streaming(sheet_name, kwargs, head=head)
+            except Exception as e:
+                # errors of the sheet itself are raised again by pandas
+                logging.warning(f"Streaming read of sheet {sheet_name} failed, reading it with pandas: {e}")
+        return self.excel_file.parse(sheet_name=sheet_name, **kwargs)
+
+    def _streaming_supported(self):
+        import pandas as pd
+        if self.excel_file.engine != 'openpyxl':
+            return False
+        if '.'.join(pd.__version__.split('.')[:2]) not in STREAMING_PANDAS_VERSIONS or \
+                not hasattr(self.excel_file._reader, 'get_sheet_data'):
+            logging.info(f"Streaming reader not supported with pandas {pd.__version__}, reading with pandas")
+            return False
+        return True
+
+    def _read_streaming(self, sheet_name, kwargs, head=False):
+        """
+        Parses a sheet with pandas from a _SheetWindow, so header handling, dtypes and duplicate column names are
+        the same as pandas' own openpyxl engine. Arguments the window can't narrow the reading for (callable
+        skiprows, index_col, multi row headers) go to pandas unchanged.
+        A head read stops after nrows even without usecols, the columns of the rows below are left out.
+        """
+        header = kwargs.get('header', 0)
+        skiprows = kwargs.get('skiprows')
+        nrows = kwargs.get('nrows')
+        keep_columns = _column_positions(kwargs.get('usecols'))
+        if callable(skiprows) or kwargs.get('index_col') is not None or \
+                (header is not None and not isinstance(header, int)):
+            return self.excel_file.parse(sheet_name=sheet_name, **kwargs)
+
+        skiprows = set(range(skiprows)) if isinstance(skiprows, int) else set(skiprows or [])
+        rows_needed = None
+        # without usecols the columns right of the rows read would be missing, pandas adds them as Unnamed
+        # columns, which only matters when data rows are read. The footer rows are only known at the end of the
+        # sheet.
+        if nrows is not None and (keep_columns is not None or nrows == 0 or head) and not kwargs.get('skipfooter'):
+            rows_needed = (header + 1 if header is not None else 0) + nrows
+
+        reader = self.excel_file._reader
+        get_sheet_data = reader.get_sheet_data
+        reader.get_sheet_data = lambda sheet, *args: get_sheet_data(
+            _SheetWindow(sheet, skiprows=skiprows, header=header, rows_needed=rows_needed,
+                         keep_columns=keep_columns), *args)
+        try:
+            return self.excel_file.parse(sheet_name=sheet_name, **kwargs)
+        finally:
+            del reader.get_sheet_data
+
+    def get_columns(self, sheet_name=0, header=0, skiprows=None):
+        """
+        Returns the column names of a sheet, reading the rows up to the header only
+        :param sheet_name: 'Inventory'
+        :param header: 0
+        :param skiprows: [0, 1, 2, 3, 4, 6]
+        :return: ['Article', 'Description', 'Quantity'] named like parse() names them, in the sheet order
+        """
+        kwargs = {'header': header, 'nrows': 0}
+        if skiprows is not None:
+            kwargs['skiprows'] = skiprows
+        return list(self.parse(sheet_name, **kwargs).columns)
+
+    def get_cell(self, sheet_name, row=1, col='A'):
+        """
+        Returns the value of a single cell near the top of a sheet, read from the head of the sheet
+        :param sheet_name: 'Inventory'
+        :param row: 3, counted without the empty rows
+        :param col: 'A'
+        :return: 'Week end date: Jan 30, 2021'
+        """
+        from openpyxl.utils.cell import column_index_from_string
+        if row < 1:
+            row = 1
+        df = self.head(sheet_name, nrows=row)
+        position = column_index_from_string(col) - 1
+        if position >= df.shape[1]:
+            # no value in this column in the rows read
+            return float('nan')
+        return df.iloc[row - 1, position]
+
+    def close(self):
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+        self._sheets.clear()
+        self._heads.clear()
+
+
+class CsvFile:
+
+    def __init__(self, path, encoding='utf-8'):
+        """
+        Handle on a single CSV attachment for the report metadata above the data (report dates, filters).
+        The top lines of the file are read once and shared by every lookup of the report.
+        :param path: '_data\\Baldacci\\1616101111_tb-rapport 2021 02.csv'
+        :param encoding: 'cp1252'
+        """
+        self.path = path
+        self.encoding = encoding
+        self._lines = []
+        self._complete = False
+
+    def _read_lines(self, count):
+        if len(self._lines) < count and not self._complete:
+            count = max(count, HEAD_ROWS)
+            with open(self.path, 'r', encoding=self.encoding, newline='') as f:
+                self._lines = list(itertools.islice(f, count))
+            self._complete = len(self._lines) < count
+            if self._lines and self._lines[0].startswith('\ufeff'):
+                self._lines[0] = self._lines[0][1:]
+        return self._lines[:count]
+
+    def head(self, nrows=HEAD_ROWS, **kwargs):
+        """
+        Parses the top rows of the file with pandas read_csv, from the lines read once
+        :param nrows: 4 data rows after the header
+        :param kwargs: keyword arguments supported by pandas read_csv (delimiter, usecols, header etc.)
+        :return: pandas DataFrame
+        """
+        import pandas as pd
+        skiprows = kwargs.get('skiprows') or 0
+        skipped = skiprows if isinstance(skiprows, int) else len(skiprows)
+        # a line is read for the header and empty lines are skipped by pandas, a few lines more are read
+        lines = self._read_lines(skipped + nrows + 1 + HEAD_ROWS)
+        return pd.read_csv(io.StringIO(''.join(lines)), nrows=nrows, **kwargs)